@@ -0,0 +1,46 @@
+"""/graph build time, cached response time and payload size
+
+    python backend/bench/bench_graph.py [--baseline REV]
+
+--baseline also times /graph from backend/main.py at git revision REV, e.g.
+the commit before the graph was precomputed, over the same dataset.
+"""
+import argparse
+import gzip
+
+from fastapi.testclient import TestClient
+
+from common import import_baseline, import_main, timed
+
+
+def run(main, baseline_rev, repeat):
+    client = TestClient(main.app)
+    graph, build = timed(lambda: main.RelationGraph(main.anime_df, main.manga_df))
+    print(f"{graph.node_count} nodes, {len(graph.edge_source)} edges")
+    print(f"RelationGraph build       {build * 1000:8.1f} ms")
+
+    main.relation_graph_cache.clear()
+    main.relation_graph_cache["version"] = None
+    response, first = timed(lambda: client.get("/graph", headers={"Accept-Encoding": "identity"}))
+    print(f"/graph first request      {first * 1000:8.1f} ms")
+    _, cached = timed(lambda: client.get("/graph", headers={"Accept-Encoding": "identity"}), repeat)
+    print(f"/graph cached             {cached * 1000:8.1f} ms")
+    _, cached_gzip = timed(lambda: client.get("/graph", headers={"Accept-Encoding": "gzip"}), repeat)
+    print(f"/graph cached, gzip       {cached_gzip * 1000:8.1f} ms")
+
+    body = response.content
+    print(f"payload {len(body) / 1e6:.2f} MB, gzip {len(gzip.compress(body, 6)) / 1e6:.2f} MB")
+
+    if baseline_rev:
+        baseline = TestClient(import_baseline(baseline_rev).app)
+        old_response, old = timed(lambda: baseline.get("/graph", headers={"Accept-Encoding": "identity"}), repeat)
+        print(f"/graph at {baseline_rev:<14} {old * 1000:8.1f} ms per request")
+        print(f"same payload: {old_response.json() == response.json()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--baseline", metavar="REV")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(import_main(), args.baseline, args.repeat)
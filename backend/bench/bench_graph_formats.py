@@ -0,0 +1,89 @@
+"""/graph as JSON vs /graph/binary vs /graph/links (NDJSON)
+
+Reports size, gzip size and peak memory while encoding, client-side decode
+time, and checks that both exports round-trip to the JSON payload:
+
+    python backend/bench/bench_graph_formats.py
+"""
+import gzip
+import json
+import tracemalloc
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from common import import_main, timed
+
+
+def peak(fn):
+    """(result, seconds, peak traced bytes)"""
+    tracemalloc.start()
+    result, elapsed = timed(fn)
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak_bytes
+
+
+def decode_binary(buffer):
+    """Header plus every column viewed in place as a typed array"""
+    header_length = int(np.frombuffer(buffer, "<u4", 1, 4)[0])
+    header = json.loads(buffer[8:8 + header_length])
+    base = 8 + header_length
+    columns = {name: np.frombuffer(buffer, column["dtype"], column["length"], base + column["offset"])
+               for name, column in header["columns"].items()}
+    return header, columns
+
+
+def string_table(offsets, data):
+    data = bytes(data)
+    offsets = offsets.tolist()
+    return [data[offsets[i]:offsets[i + 1]].decode("utf-8") or None for i in range(len(offsets) - 1)]
+
+
+def binary_to_dict(buffer):
+    header, columns = decode_binary(buffer)
+    types, relations = header["types"], header["relations"]
+    keys = [f"{types[t]}_{i}" for t, i in zip(columns["node_type"].tolist(), columns["node_mal_id"].tolist())]
+    labels = string_table(columns["label_offsets"], columns["label_data"])
+    urls = string_table(columns["url_offsets"], columns["url_data"])
+    nodes = [{"id": key, "mal_id": mal_id, "label": label, "type": types[t], "url": url}
+             for key, mal_id, label, t, url in zip(
+                 keys, columns["node_mal_id"].tolist(), labels, columns["node_type"].tolist(), urls)]
+    links = [{"source": keys[s], "target": keys[t], "relation": relations[r]}
+             for s, t, r in zip(columns["edge_source"].tolist(), columns["edge_target"].tolist(),
+                                columns["edge_relation"].tolist())]
+    return {"nodes": nodes, "links": links}
+
+
+def report(label, body, elapsed, peak_bytes):
+    print(f"{label:<14} encode {elapsed * 1000:7.1f} ms  peak {peak_bytes / 1e6:6.2f} MB  "
+          f"size {len(body) / 1e6:6.2f} MB  gzip {len(gzip.compress(body, 6)) / 1e6:6.2f} MB")
+
+
+def run(main):
+    graph = main.get_relation_graph()
+    print(f"{graph.node_count} nodes, {len(graph.edge_source)} edges")
+
+    body, elapsed, peak_bytes = peak(lambda: json.dumps(
+        graph.to_dict(), ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+    report("json", body, elapsed, peak_bytes)
+    packed, elapsed, peak_bytes = peak(lambda: main.pack_graph_binary(graph))
+    report("binary", packed, elapsed, peak_bytes)
+    links, elapsed, peak_bytes = peak(lambda: b"".join(main.iter_graph_links(graph)))
+    report("ndjson links", links, elapsed, peak_bytes)
+
+    payload, elapsed = timed(lambda: json.loads(body), repeat=3)
+    print(f"client json.loads                 {elapsed * 1000:8.2f} ms")
+    _, elapsed = timed(lambda: decode_binary(packed), repeat=100)
+    print(f"client binary column views        {elapsed * 1000:8.3f} ms")
+    decoded, elapsed = timed(lambda: binary_to_dict(packed), repeat=3)
+    print(f"client binary to nodes and links  {elapsed * 1000:8.2f} ms")
+
+    client = TestClient(main.app)
+    streamed = [json.loads(line) for line in client.get("/graph/links").text.splitlines()]
+    print(f"binary round-trip: {decoded == payload}, ndjson round-trip: {streamed == payload['links']}, "
+          f"/graph/binary matches: {client.get('/graph/binary').content == packed}")
+
+
+if __name__ == "__main__":
+    run(import_main())
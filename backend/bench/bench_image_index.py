@@ -0,0 +1,48 @@
+"""Image endpoints served from the local image index vs the Jikan fallback
+
+Ids in the dataset are answered from the index; unknown ids go to a local
+stand-in for Jikan. Every id is requested once, so each fallback call reaches it:
+
+    python backend/bench/bench_image_index.py [requests]
+"""
+import os
+import sys
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from common import LocalServer, import_main, timed
+
+stand_in = FastAPI()
+
+
+@stand_in.get("/v4/anime/{mal_id}/pictures")
+def pictures(mal_id: int):
+    return {"data": [{"jpg": {"image_url": f"https://cdn.example/{mal_id}.jpg"}}]}
+
+
+def run(main, requests):
+    index, build = timed(lambda: main.ImageIndex(main.anime_df))
+    mal_ids = main.anime_df['mal_id'].to_numpy()
+    _, lookup = timed(lambda: [index.jpg_urls(int(mal_id)) for mal_id in mal_ids[:1000]], repeat=10)
+    print(f"index build over {len(mal_ids)} anime  {build * 1000:7.2f} ms")
+    print(f"jpg_urls lookup                  {lookup / 1000 * 1e6:7.2f} us")
+
+    unknown = int(mal_ids.max()) + 1
+    with TestClient(main.app) as client:
+        for label, ids in [("local", mal_ids[:requests]), ("jikan", range(unknown, unknown + requests))]:
+            def fetch():
+                for mal_id in ids:
+                    response = client.get(f"/anime/{mal_id}/image")
+                    assert response.headers["x-image-source"] == label, response.text
+            _, elapsed = timed(fetch)
+            print(f"/anime/{{id}}/image {label:5}           {elapsed / len(ids) * 1000:7.2f} ms/request")
+
+
+if __name__ == "__main__":
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    with LocalServer(stand_in) as server:
+        os.environ.update(
+            JIKAN_BASE_URL=f"{server.url}/v4", JIKAN_CACHE_PATH="", JIKAN_RATE_PER_SECOND="1e9", JIKAN_RATE_PER_MINUTE="1e9",
+            JIKAN_PREFETCH_LIMIT="0", STATS_WARM_ON_STARTUP="0")
+        run(import_main(), requests)
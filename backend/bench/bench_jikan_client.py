@@ -0,0 +1,51 @@
+"""Pooled Jikan client vs a new httpx client per request
+
+Runs sequential requests against a local stand-in for Jikan, so the numbers
+show connection setup cost and not upstream latency:
+
+    python backend/bench/bench_jikan_client.py [requests]
+"""
+import asyncio
+import os
+import sys
+
+import httpx
+from fastapi import FastAPI
+
+from common import LocalServer, import_main
+
+stand_in = FastAPI()
+
+
+@stand_in.get("/v4/anime/{mal_id}/pictures")
+def pictures(mal_id: int):
+    return {"data": [{"jpg": {"image_url": f"https://cdn.example/{mal_id}.jpg"}}]}
+
+
+async def run(main, requests):
+    loop = asyncio.get_running_loop()
+
+    start = loop.time()
+    for i in range(requests):
+        async with httpx.AsyncClient() as client:
+            (await client.get(f"{main.JIKAN_BASE_URL}/anime/{i}/pictures")).raise_for_status()
+    per_request = (loop.time() - start) / requests
+
+    start = loop.time()
+    for i in range(requests):
+        (await main.jikan_get(f"/anime/{i}/pictures")).raise_for_status()
+    pooled = (loop.time() - start) / requests
+    await main.close_jikan_client()
+
+    print(f"{requests} sequential requests")
+    print(f"  client per request  {per_request * 1000:7.2f} ms/request")
+    print(f"  pooled jikan_get    {pooled * 1000:7.2f} ms/request")
+
+
+if __name__ == "__main__":
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    with LocalServer(stand_in) as server:
+        os.environ["JIKAN_BASE_URL"] = f"{server.url}/v4"
+        # Only the connection cost is measured here, so lift Jikan's request budget
+        os.environ["JIKAN_RATE_PER_SECOND"] = os.environ["JIKAN_RATE_PER_MINUTE"] = "1e9"
+        asyncio.run(run(import_main(), requests))
@@ -0,0 +1,93 @@
+"""compute_stats() over synthetic datasets of growing size
+
+    python backend/bench/bench_stats.py [--rows 10000 100000 1000000] [--baseline REV]
+
+Each size builds N anime and N/2 manga rows with list columns shaped like
+the real dataset. --baseline also runs compute_stats() from backend/main.py
+at git revision REV on the same frames and checks the output is identical.
+"""
+import argparse
+import json
+
+import numpy as np
+import pandas as pd
+
+from common import import_baseline, import_main, timed
+
+GENRES = [f"Genre{i}" for i in range(40)]
+STUDIOS = [f"Studio{i}" for i in range(400)]
+PRODUCERS = [f"Producer{i}" for i in range(800)]
+DEMOGRAPHICS = ["Shounen", "Seinen", "Shoujo", "Josei"]
+AUTHORS = [f"Author{i}" for i in range(20000)]
+SERIALIZATIONS = [f"Magazine{i}" for i in range(300)]
+
+
+def named_lists(rng, pool, n, most, least=0):
+    """n JSON cells of least..most {"mal_id", "type", "name"} entries drawn from pool"""
+    counts = rng.integers(least, most + 1, n)
+    picks = rng.integers(0, len(pool), (n, most))
+    return [json.dumps([{"mal_id": int(i), "type": "x", "name": pool[i]} for i in row[:count]])
+            for row, count in zip(picks, counts)]
+
+
+def synthetic_frame(rng, n, kind):
+    columns = dict(
+        mal_id=np.arange(1, n + 1),
+        title=[f"Title {i}" for i in range(n)],
+        score=np.where(rng.random(n) < .85, np.round(rng.uniform(3, 9.5, n), 2), np.nan),
+        members=rng.integers(10, 2_000_000, n),
+        favorites=rng.integers(0, 100_000, n),
+        rank=rng.integers(1, n + 1, n),
+        popularity=rng.integers(1, n + 1, n),
+        status=rng.choice(["Finished Airing", "Currently Airing", "Finished", "Publishing"], n),
+        type=rng.choice(["TV", "Movie", "OVA", "Manga"], n),
+        genres=named_lists(rng, GENRES, n, 4),
+        demographics=named_lists(rng, DEMOGRAPHICS, n, 1),
+    )
+    if kind == 'anime':
+        columns.update(
+            studios=named_lists(rng, STUDIOS, n, 2),
+            producers=named_lists(rng, PRODUCERS, n, 3),
+            rating=rng.choice(["PG-13", "R", "G"], n),
+            source=rng.choice(["Manga", "Original"], n),
+            year=np.where(rng.random(n) < .9, rng.integers(1960, 2025, n).astype(float), np.nan),
+            season=rng.choice(["spring", "summer", "fall", "winter"], n),
+            broadcast_day=rng.choice(["Mondays", "Sundays"], n),
+            broadcast_time=rng.choice(["23:30", "08:00", "17:00", "19:00"], n),
+            episodes=rng.choice([1, 12, 24, 60], n).astype(float),
+        )
+    else:
+        columns.update(
+            authors=named_lists(rng, AUTHORS, n, 2),
+            serializations=named_lists(rng, SERIALIZATIONS, n, 1, 1),
+            chapters=rng.choice([10, 80, 300, 700], n).astype(float),
+            volumes=rng.choice([3, 15, 60], n).astype(float),
+        )
+    return pd.DataFrame(columns)
+
+
+def run(main, rows, baseline_rev):
+    baseline = import_baseline(baseline_rev) if baseline_rev else None
+
+    def encode(stats):
+        return json.dumps(main.jsonable_encoder(stats), ensure_ascii=False, separators=(",", ":"))
+
+    for n in rows:
+        rng = np.random.default_rng(0)
+        anime, manga = synthetic_frame(rng, n, 'anime'), synthetic_frame(rng, n // 2, 'manga')
+        main.anime_df, main.manga_df, main.dataset_version = anime, manga, None
+        current, elapsed = timed(lambda: encode(main.compute_stats()))
+        line = f"{n:>9} anime + {n // 2:>8} manga  {elapsed:8.2f} s"
+        if baseline is not None:
+            baseline.anime_df, baseline.manga_df = anime, manga
+            old, old_elapsed = timed(lambda: encode(baseline.compute_stats()))
+            line += f"  {baseline_rev}: {old_elapsed:8.2f} s  identical: {old == current}"
+        print(line, flush=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--baseline", metavar="REV")
+    args = parser.parse_args()
+    run(import_main(), args.rows, args.baseline)
@@ -0,0 +1,66 @@
+"""Helpers shared by the benchmark scripts in this directory"""
+import socket
+import subprocess
+import sys
+import types
+import threading
+import time
+from pathlib import Path
+
+import uvicorn
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def import_main():
+    """Import backend/main.py the way the tests do; needs the dataset files next to it"""
+    sys.path.insert(0, str(BACKEND_DIR))
+    import main
+    return main
+
+
+def import_baseline(rev):
+    """backend/main.py as of git revision rev, loaded as a separate module over the same dataset"""
+    source = subprocess.run(["git", "show", f"{rev}:backend/main.py"], cwd=BACKEND_DIR,
+                            capture_output=True, text=True, check=True).stdout
+    module = types.ModuleType("baseline_main")
+    module.__file__ = str(BACKEND_DIR / "main.py")
+    exec(compile(source, f"{rev}:backend/main.py", "exec"), module.__dict__)
+    return module
+
+
+def timed(fn, repeat=1):
+    """(last result, mean seconds per call)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeat
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class LocalServer:
+    """Serve an ASGI app on 127.0.0.1 from a background thread, so calls go over real sockets"""
+
+    def __init__(self, app):
+        self.port = free_port()
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join()
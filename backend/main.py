@@ -8,9 +8,26 @@ from fastapi.middleware.cors import CORSMiddleware
 from pathlib import Path
 import re
 from pydantic import BaseModel
+from typing import Literal, Optional, List
 from dotenv import load_dotenv
+from contextlib import asynccontextmanager
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    # Shared Jikan client: one connection pool for the whole process
+    get_jikan_client()
+    get_jikan_cache()
+    jikan_prefetcher.start()
+    stats_warmup = warm_stats_cache()
+    yield
+    if stats_warmup is not None:
+        await asyncio.gather(stats_warmup, return_exceptions=True)
+    await jikan_prefetcher.stop()
+    await close_jikan_cache()
+    await jikan_limiter.close()
+    await close_jikan_client()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -88,10 +105,26 @@ def parse_array_field(field_value):
     
     return field_value if isinstance(field_value, list) else []
 
-@app.get("/anime")
-def get_anime(
-    limit: int = 20,
-    offset: int = 0,
+def extract_image_urls(images_data):
+    """Return (image_url, thumbnail_url) from an images field, preferring webp over jpg"""
+    if images_data is None or (not isinstance(images_data, (dict, str))) or images_data == "":
+        return None, None
+    try:
+        images_dict = json.loads(images_data) if isinstance(images_data, str) else images_data
+    except (json.JSONDecodeError, TypeError):
+        return None, None
+
+    if isinstance(images_dict, dict):
+        for format_type in ['webp', 'jpg']:
+            if format_type in images_dict and isinstance(images_dict[format_type], dict):
+                image_url = (images_dict[format_type].get('large_image_url') or
+                             images_dict[format_type].get('image_url'))
+                thumbnail_url = images_dict[format_type].get('small_image_url')
+                return image_url, thumbnail_url
+    return None, None
+
+def filter_anime(
+    df,
     search: str = None,
     genre: str = None,
     year: int = None,
@@ -101,15 +134,19 @@ def get_anime(
     min_score: float = None,
     episode_type: str = None,
     completed_only: bool = None,
+    franchise: int = None,
 ):
-    df = anime_df.copy()
+    """Apply the /anime listing filters to df and return the matching rows"""
+    # --- Franchise filter (ids from /franchises) ---
+    if franchise is not None:
+        df = df[df['mal_id'].isin(get_franchise_index().member_mal_ids(franchise, 'anime'))]
 
     # --- Search filter (search in title and title_english) ---
     if search:
         search_mask = (
-            df['title'].str.contains(search, case=False, na=False) |
-            df['title_english'].str.contains(search, case=False, na=False) | 
-            df['title_japanese'].str.contains(search, case=False, na=False)
+            df['title'].str.contains(search, case=False, na=False, regex=False) |
+            df['title_english'].str.contains(search, case=False, na=False, regex=False) | 
+            df['title_japanese'].str.contains(search, case=False, na=False, regex=False)
         )
         df = df[search_mask]
 
@@ -219,8 +256,7 @@ def get_anime(
             except (ValueError, TypeError):
                 return 'unknown'
         
-        df['computed_episode_type'] = df.apply(get_episode_type, axis=1)
-        df = df[df['computed_episode_type'] == episode_type.lower()]
+        df = df[df.apply(get_episode_type, axis=1) == episode_type.lower()]
 
     # --- Completed only filter  ---
     if completed_only is not None:
@@ -230,8 +266,31 @@ def get_anime(
             status_lower = str(status_val).lower()
             return status_lower in ['finished airing', 'completed']
         
-        df['computed_is_completed'] = df['status'].apply(is_completed)
-        df = df[df['computed_is_completed'] == completed_only]
+        df = df[df['status'].apply(is_completed) == completed_only]
+
+    return df
+
+@app.get("/anime")
+def get_anime(
+    limit: int = 20,
+    offset: int = 0,
+    search: str = None,
+    genre: str = None,
+    year: int = None,
+    season: str = None,
+    format: str = None,
+    status: str = None,
+    min_score: float = None,
+    episode_type: str = None,
+    completed_only: bool = None,
+    franchise: int = None,
+):
+    df = filter_anime(
+        anime_df.copy(),
+        search=search, genre=genre, year=year, season=season, format=format,
+        status=status, min_score=min_score, episode_type=episode_type,
+        completed_only=completed_only, franchise=franchise,
+    )
 
     # --- Sort by score ---
     # Create computed columns for sorting
@@ -439,34 +498,1051 @@ def safe_json_parse(value):
         print(f"JSON parse error: {value} — {e}")
         return []
     
+import asyncio
+import heapq
+import random
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from email.utils import parsedate_to_datetime
+from functools import partial
 import httpx
 from fastapi.responses import JSONResponse
 
-JIKAN_BASE_URL = "https://api.jikan.moe/v4"
+JIKAN_BASE_URL = os.getenv('JIKAN_BASE_URL', "https://api.jikan.moe/v4")
 
-@app.get("/anime/{anime_id}")
-async def get_anime_detail(anime_id: int):
-    async with httpx.AsyncClient() as client:
-        detail_response = await client.get(f"{JIKAN_BASE_URL}/anime/{anime_id}/full")
-        if detail_response.status_code != 200:
-            raise HTTPException(status_code=detail_response.status_code, detail="Anime not found")
+# Connection settings for the shared Jikan client
+JIKAN_CONNECT_TIMEOUT = float(os.getenv('JIKAN_CONNECT_TIMEOUT', '5'))
+JIKAN_READ_TIMEOUT = float(os.getenv('JIKAN_READ_TIMEOUT', '10'))
+JIKAN_POOL_TIMEOUT = float(os.getenv('JIKAN_POOL_TIMEOUT', '5'))
+JIKAN_MAX_CONNECTIONS = int(os.getenv('JIKAN_MAX_CONNECTIONS', '20'))
+JIKAN_MAX_KEEPALIVE = int(os.getenv('JIKAN_MAX_KEEPALIVE', '10'))
+JIKAN_KEEPALIVE_EXPIRY = float(os.getenv('JIKAN_KEEPALIVE_EXPIRY', '30'))
+JIKAN_HTTP2 = os.getenv('JIKAN_HTTP2', '').lower() in ('1', 'true', 'yes')
+
+jikan_client = None
+
+def create_jikan_client():
+    """Build the pooled keep-alive client used for every Jikan call"""
+    http2 = JIKAN_HTTP2
+    if http2:
+        try:
+            import h2  # noqa: F401 - httpx needs it for HTTP/2
+        except ImportError:
+            print("Warning: JIKAN_HTTP2 is set but h2 is not installed, falling back to HTTP/1.1")
+            http2 = False
+
+    return httpx.AsyncClient(
+        http2=http2,
+        timeout=httpx.Timeout(
+            connect=JIKAN_CONNECT_TIMEOUT,
+            read=JIKAN_READ_TIMEOUT,
+            write=JIKAN_READ_TIMEOUT,
+            pool=JIKAN_POOL_TIMEOUT,
+        ),
+        limits=httpx.Limits(
+            max_connections=JIKAN_MAX_CONNECTIONS,
+            max_keepalive_connections=JIKAN_MAX_KEEPALIVE,
+            keepalive_expiry=JIKAN_KEEPALIVE_EXPIRY,
+        ),
+    )
+
+def get_jikan_client():
+    global jikan_client
+    if jikan_client is None or jikan_client.is_closed:
+        jikan_client = create_jikan_client()
+    return jikan_client
+
+async def close_jikan_client():
+    global jikan_client
+    if jikan_client is not None:
+        await jikan_client.aclose()
+        jikan_client = None
+
+# =============================================================================
+# JIKAN RATE LIMITING
+# =============================================================================
+
+# Jikan allows 3 requests per second and 60 per minute
+JIKAN_RATE_PER_SECOND = float(os.getenv('JIKAN_RATE_PER_SECOND', '3'))
+JIKAN_RATE_PER_MINUTE = float(os.getenv('JIKAN_RATE_PER_MINUTE', '60'))
+JIKAN_MAX_RETRIES = int(os.getenv('JIKAN_MAX_RETRIES', '3'))
+JIKAN_RETRY_BASE_DELAY = float(os.getenv('JIKAN_RETRY_BASE_DELAY', '0.5'))
+# Longest Retry-After we are willing to wait out before passing the error on
+JIKAN_MAX_RETRY_DELAY = float(os.getenv('JIKAN_MAX_RETRY_DELAY', '10'))
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_DEFAULT = 1
+PRIORITY_BACKGROUND = 2
+
+# Longest time a request may wait in the queue, per priority (seconds)
+JIKAN_QUEUE_MAX_WAIT = {
+    PRIORITY_INTERACTIVE: float(os.getenv('JIKAN_QUEUE_MAX_WAIT', '10')),
+    PRIORITY_DEFAULT: float(os.getenv('JIKAN_QUEUE_MAX_WAIT', '10')),
+    PRIORITY_BACKGROUND: float(os.getenv('JIKAN_QUEUE_MAX_WAIT_BACKGROUND', '120')),
+}
+
+class JikanRateLimiter:
+    """Token buckets shared by every Jikan call, released in priority order"""
+
+    def __init__(self, limits):
+        # Each bucket is [capacity, refill per second, tokens]
+        self.buckets = [[capacity, capacity / period, capacity] for capacity, period in limits]
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.waiters = []
+        self.sequence = 0
+        self.dispatcher = None
+        self.metrics = {
+            'granted': 0,
+            'queued': 0,
+            'rejected': 0,
+            'throttled': 0,
+            'retries': 0,
+            'max_queue_depth': 0,
+        }
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self.updated_at
+        self.updated_at = now
+        for bucket in self.buckets:
+            bucket[2] = min(bucket[0], bucket[2] + elapsed * bucket[1])
+        return now
+
+    def _delay_until_available(self):
+        """Seconds until every bucket has a token (0 when one can be taken now)"""
+        now = self._refill()
+        delay = max(0.0, self.blocked_until - now)
+        for capacity, rate, tokens in self.buckets:
+            if tokens < 1:
+                delay = max(delay, (1 - tokens) / rate)
+        return delay
+
+    def _take(self):
+        for bucket in self.buckets:
+            bucket[2] -= 1
+        self.metrics['granted'] += 1
+
+    def queue_depth(self, priority=None):
+        return sum(
+            1 for waiter_priority, _, future in self.waiters
+            if not future.done() and (priority is None or waiter_priority == priority)
+        )
+
+    async def acquire(self, priority=PRIORITY_DEFAULT, max_wait=None):
+        """Wait for a token; raises asyncio.TimeoutError after max_wait seconds"""
+        if not self.waiters and self._delay_until_available() <= 0:
+            self._take()
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self.sequence += 1
+        heapq.heappush(self.waiters, (priority, self.sequence, future))
+        self.metrics['queued'] += 1
+        self.metrics['max_queue_depth'] = max(self.metrics['max_queue_depth'], self.queue_depth())
+        if self.dispatcher is None:
+            self.dispatcher = asyncio.create_task(self._dispatch())
+
+        try:
+            await asyncio.wait_for(future, timeout=max_wait)
+        except asyncio.TimeoutError:
+            self.metrics['rejected'] += 1
+            raise
+
+    async def _dispatch(self):
+        try:
+            while self.waiters:
+                future = self.waiters[0][2]
+                if future.done():
+                    heapq.heappop(self.waiters)
+                    continue
+                delay = self._delay_until_available()
+                if delay > 0:
+                    # Re-check the head afterwards: a higher priority waiter may have arrived
+                    await asyncio.sleep(delay)
+                    continue
+                heapq.heappop(self.waiters)
+                self._take()
+                future.set_result(None)
+        finally:
+            self.dispatcher = None
+
+    def pause(self, seconds):
+        """Hold every caller back, e.g. after Jikan answered 429"""
+        self.metrics['throttled'] += 1
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def stats(self):
+        return {
+            **self.metrics,
+            'queue_depth': self.queue_depth(),
+            'queue_depth_by_priority': {
+                'interactive': self.queue_depth(PRIORITY_INTERACTIVE),
+                'default': self.queue_depth(PRIORITY_DEFAULT),
+                'background': self.queue_depth(PRIORITY_BACKGROUND),
+            },
+            'paused_for': max(0.0, self.blocked_until - time.monotonic()),
+        }
+
+    async def close(self):
+        if self.dispatcher is not None:
+            self.dispatcher.cancel()
+        for _, _, future in self.waiters:
+            future.cancel()
+        self.waiters.clear()
+
+jikan_limiter = JikanRateLimiter([
+    (JIKAN_RATE_PER_SECOND, 1),
+    (JIKAN_RATE_PER_MINUTE, 60),
+])
+
+def retry_delay(response, attempt):
+    """Delay before retrying a 429/5xx: Retry-After when given, else exponential backoff with jitter"""
+    retry_after = response.headers.get('retry-after')
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    return JIKAN_RETRY_BASE_DELAY * (2 ** attempt) * (1 + random.random() * 0.25)
+
+# =============================================================================
+# JIKAN CIRCUIT BREAKER
+# =============================================================================
+
+# Hard deadline for one upstream call, per priority (seconds)
+JIKAN_CALL_DEADLINE = {
+    PRIORITY_INTERACTIVE: float(os.getenv('JIKAN_CALL_DEADLINE', '5')),
+    PRIORITY_DEFAULT: float(os.getenv('JIKAN_CALL_DEADLINE', '5')),
+    PRIORITY_BACKGROUND: float(os.getenv('JIKAN_CALL_DEADLINE_BACKGROUND', '20')),
+}
+# Budget for all attempts of one jikan_get together, retry sleeps included (seconds)
+JIKAN_TOTAL_DEADLINE = {
+    PRIORITY_INTERACTIVE: float(os.getenv('JIKAN_TOTAL_DEADLINE', '10')),
+    PRIORITY_DEFAULT: float(os.getenv('JIKAN_TOTAL_DEADLINE', '10')),
+    PRIORITY_BACKGROUND: float(os.getenv('JIKAN_TOTAL_DEADLINE_BACKGROUND', '60')),
+}
+JIKAN_BREAKER_WINDOW = float(os.getenv('JIKAN_BREAKER_WINDOW', '60'))
+JIKAN_BREAKER_MIN_CALLS = int(os.getenv('JIKAN_BREAKER_MIN_CALLS', '10'))
+JIKAN_BREAKER_FAILURE_RATE = float(os.getenv('JIKAN_BREAKER_FAILURE_RATE', '0.5'))
+JIKAN_BREAKER_OPEN_SECONDS = float(os.getenv('JIKAN_BREAKER_OPEN_SECONDS', '30'))
+
+def is_upstream_failure(status_code):
+    """Statuses that mean Jikan is unhealthy or refusing us, so cached or local data may answer instead"""
+    return status_code == 429 or status_code >= 500
+
+class JikanUnavailable(HTTPException):
+    """Raised without calling Jikan while the circuit breaker is open"""
+
+    def __init__(self, retry_after):
+        super().__init__(status_code=503, detail="Jikan is unavailable, try again later",
+                         headers={"Retry-After": str(max(1, int(math.ceil(retry_after))))})
+
+class CircuitBreaker:
+    """Failure-rate breaker: opens when too many recent calls failed, probes again after a cooldown"""
+
+    def __init__(self, window, min_calls, failure_rate, open_seconds):
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self.outcomes = deque()
+        self.state = 'closed'
+        self.opened_at = 0.0
+        self.probe_started_at = None
+        self.metrics = {
+            'successes': 0,
+            'failures': 0,
+            'short_circuited': 0,
+            'opened': 0,
+        }
+
+    def _trim(self, now):
+        while self.outcomes and now - self.outcomes[0][0] > self.window:
+            self.outcomes.popleft()
+
+    def _open(self, now):
+        self.state = 'open'
+        self.opened_at = now
+        self.probe_started_at = None
+        self.metrics['opened'] += 1
+
+    def retry_after(self):
+        return max(0.0, self.opened_at + self.open_seconds - time.monotonic())
+
+    def allow(self):
+        """Whether a call may go upstream now; in half-open state only one probe at a time"""
+        now = time.monotonic()
+        if self.state == 'open' and now - self.opened_at >= self.open_seconds:
+            self.state = 'half_open'
+        if self.state == 'half_open':
+            # A probe that never reported back (cancelled, queue timeout) is replaced after a cooldown
+            if self.probe_started_at is None or now - self.probe_started_at >= self.open_seconds:
+                self.probe_started_at = now
+                return True
+        elif self.state == 'closed':
+            return True
+
+        self.metrics['short_circuited'] += 1
+        return False
+
+    def record(self, failed):
+        now = time.monotonic()
+        self.metrics['failures' if failed else 'successes'] += 1
+        if self.state == 'half_open':
+            if failed:
+                self._open(now)
+            else:
+                self.state = 'closed'
+                self.outcomes.clear()
+            self.probe_started_at = None
+            return
+        if self.state == 'open':
+            return
+
+        self.outcomes.append((now, failed))
+        self._trim(now)
+        failures = sum(1 for _, outcome in self.outcomes if outcome)
+        if len(self.outcomes) >= self.min_calls and failures / len(self.outcomes) >= self.failure_rate:
+            self._open(now)
+
+    def stats(self):
+        self._trim(time.monotonic())
+        calls = len(self.outcomes)
+        failures = sum(1 for _, outcome in self.outcomes if outcome)
+        return {
+            **self.metrics,
+            'state': self.state,
+            'window_calls': calls,
+            'window_failure_rate': failures / calls if calls else 0,
+            'retry_after': self.retry_after() if self.state == 'open' else 0,
+        }
+
+jikan_breaker = CircuitBreaker(
+    window=JIKAN_BREAKER_WINDOW,
+    min_calls=JIKAN_BREAKER_MIN_CALLS,
+    failure_rate=JIKAN_BREAKER_FAILURE_RATE,
+    open_seconds=JIKAN_BREAKER_OPEN_SECONDS,
+)
+
+async def jikan_get(path, priority=PRIORITY_DEFAULT):
+    """GET a Jikan path through the circuit breaker, rate limiter and shared client
+
+    Every call has a hard deadline, and all attempts share a total budget.
+    429 and 5xx answers are retried with backoff (honouring Retry-After) while
+    the budget still covers the delay plus a full call; transport errors are
+    mapped to HTTP errors.
+    """
+    loop = asyncio.get_running_loop()
+    deadline_at = loop.time() + JIKAN_TOTAL_DEADLINE[priority]
+    for attempt in range(JIKAN_MAX_RETRIES + 1):
+        if not jikan_breaker.allow():
+            raise JikanUnavailable(jikan_breaker.retry_after())
+
+        try:
+            await jikan_limiter.acquire(priority, max_wait=JIKAN_QUEUE_MAX_WAIT[priority])
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=503, detail="Jikan request queue is full, try again later",
+                                headers={"Retry-After": "1"})
+
+        remaining = deadline_at - loop.time()
+        if remaining <= 0:
+            raise HTTPException(status_code=504, detail="Jikan request timed out")
+        try:
+            response = await asyncio.wait_for(
+                get_jikan_client().get(f"{JIKAN_BASE_URL}{path}"),
+                timeout=min(JIKAN_CALL_DEADLINE[priority], remaining),
+            )
+        except (asyncio.TimeoutError, httpx.TimeoutException):
+            jikan_breaker.record(failed=True)
+            raise HTTPException(status_code=504, detail="Jikan request timed out")
+        except httpx.HTTPError as e:
+            jikan_breaker.record(failed=True)
+            raise HTTPException(status_code=502, detail=f"Jikan request failed: {str(e)}")
+
+        jikan_breaker.record(failed=response.status_code >= 500)
+        if response.status_code != 429 and response.status_code < 500:
+            return response
+
+        delay = retry_delay(response, attempt)
+        if response.status_code == 429:
+            jikan_limiter.pause(delay)
+        if attempt == JIKAN_MAX_RETRIES or delay > JIKAN_MAX_RETRY_DELAY:
+            return response
+        if deadline_at - loop.time() < delay + JIKAN_CALL_DEADLINE[priority]:
+            # Not enough budget left for a full retry
+            return response
+
+        jikan_limiter.metrics['retries'] += 1
+        await asyncio.sleep(delay)
+
+# =============================================================================
+# JIKAN RESPONSE CACHE
+# =============================================================================
+
+# Fresh lifetime per endpoint, keyed by the last path segment (seconds)
+JIKAN_CACHE_TTLS = {
+    'full': int(os.getenv('JIKAN_CACHE_TTL_FULL', str(24 * 3600))),
+    'recommendations': int(os.getenv('JIKAN_CACHE_TTL_RECOMMENDATIONS', str(24 * 3600))),
+    'pictures': int(os.getenv('JIKAN_CACHE_TTL_PICTURES', str(7 * 24 * 3600))),
+}
+JIKAN_CACHE_DEFAULT_TTL = int(os.getenv('JIKAN_CACHE_DEFAULT_TTL', '3600'))
+# How long past its TTL an entry may still be served while it is refreshed
+JIKAN_CACHE_STALE_TTL = int(os.getenv('JIKAN_CACHE_STALE_TTL', str(7 * 24 * 3600)))
+# How long a 404 from Jikan is remembered (memory only), so unknown ids are not re-fetched on every view
+JIKAN_CACHE_NOT_FOUND_TTL = int(os.getenv('JIKAN_CACHE_NOT_FOUND_TTL', '600'))
+JIKAN_CACHE_MEMORY_ITEMS = int(os.getenv('JIKAN_CACHE_MEMORY_ITEMS', '2048'))
+# Empty string keeps the cache in memory only
+JIKAN_CACHE_PATH = os.getenv('JIKAN_CACHE_PATH', str(BASE_DIR / 'jikan_cache.sqlite3'))
+
+class JikanCache:
+    """Two-tier cache of raw Jikan response bodies: in-memory LRU over an SQLite file
+
+    The memory tier is read on the event loop; every SQLite query runs in a
+    worker thread, so a slow disk or fsync never stalls other requests.
+    """
+
+    def __init__(self, path=None, memory_items=2048, ttls=None, default_ttl=3600, stale_ttl=0, not_found_ttl=0):
+        self.memory = OrderedDict()
+        self.memory_items = memory_items
+        self.ttls = ttls or {}
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self.not_found_ttl = not_found_ttl
+        # path -> time.time() when its 404 expires, oldest first
+        self.not_found = OrderedDict()
+        self.refreshing = {}
+        # lock guards the memory tier, db_lock the SQLite connection; the event loop only takes lock
+        self.lock = threading.Lock()
+        self.db_lock = threading.Lock()
+        self.metrics = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'stale_served': 0,
+            'expired': 0,
+            'not_found_hits': 0,
+            'stores': 0,
+            'refreshes': 0,
+            'refresh_errors': 0,
+        }
+
+        self.db = None
+        if path:
+            try:
+                self.db = sqlite3.connect(path, check_same_thread=False)
+                # WAL lets stats() read while a write is in progress; NORMAL skips the fsync per commit
+                self.db.execute("PRAGMA journal_mode=WAL")
+                self.db.execute("PRAGMA synchronous=NORMAL")
+                self.db.execute(
+                    "CREATE TABLE IF NOT EXISTS jikan_cache "
+                    "(path TEXT PRIMARY KEY, fetched_at REAL NOT NULL, body BLOB NOT NULL)"
+                )
+                self.db.commit()
+            except sqlite3.Error as e:
+                print(f"Jikan cache disk store unavailable ({path}): {e}")
+                self.db = None
+
+    def ttl_for(self, path):
+        return self.ttls.get(path.rstrip('/').rsplit('/', 1)[-1], self.default_ttl)
+
+    def _remember(self, path, entry):
+        self.memory[path] = entry
+        self.memory.move_to_end(path)
+        while len(self.memory) > self.memory_items:
+            self.memory.popitem(last=False)
+
+    def _query(self, sql, params=()):
+        """Run one statement on the disk tier and return its first row; call from a worker thread"""
+        with self.db_lock:
+            if self.db is None:
+                return None
+            row = self.db.execute(sql, params).fetchone()
+            if not sql.startswith("SELECT"):
+                self.db.commit()
+            return row
+
+    async def get(self, path):
+        """Return (body, fetched_at) from memory or disk, or None"""
+        with self.lock:
+            entry = self.memory.get(path)
+            if entry is not None:
+                self.memory.move_to_end(path)
+                self.metrics['memory_hits'] += 1
+                return entry
+
+        if self.db is not None:
+            row = await asyncio.to_thread(
+                self._query, "SELECT body, fetched_at FROM jikan_cache WHERE path = ?", (path,))
+            if row is not None:
+                entry = (bytes(row[0]), row[1])
+                with self.lock:
+                    self._remember(path, entry)
+                    self.metrics['disk_hits'] += 1
+                return entry
+
+        self.metrics['misses'] += 1
+        return None
+
+    def is_missing(self, path):
+        """True while a recent 404 for path is remembered"""
+        with self.lock:
+            expires_at = self.not_found.get(path)
+            if expires_at is None:
+                return False
+            if expires_at < time.time():
+                del self.not_found[path]
+                return False
+            return True
+
+    def set_missing(self, path):
+        """Remember a 404 for path for not_found_ttl seconds"""
+        if self.not_found_ttl <= 0:
+            return
+        with self.lock:
+            self.not_found[path] = time.time() + self.not_found_ttl
+            self.not_found.move_to_end(path)
+            while len(self.not_found) > self.memory_items:
+                self.not_found.popitem(last=False)
+
+    async def set(self, path, body, fetched_at=None):
+        entry = (body, fetched_at if fetched_at is not None else time.time())
+        with self.lock:
+            self.not_found.pop(path, None)
+            self._remember(path, entry)
+            self.metrics['stores'] += 1
+        if self.db is not None:
+            await asyncio.to_thread(
+                self._query, "INSERT OR REPLACE INTO jikan_cache (path, fetched_at, body) VALUES (?, ?, ?)",
+                (path, entry[1], entry[0]))
+
+    async def is_fresh(self, path):
+        """True when path has an entry within its TTL; does not touch the hit/miss counters"""
+        with self.lock:
+            entry = self.memory.get(path)
+        if entry is None and self.db is not None:
+            row = await asyncio.to_thread(self._query, "SELECT fetched_at FROM jikan_cache WHERE path = ?", (path,))
+            entry = (None, row[0]) if row is not None else None
+        return entry is not None and time.time() - entry[1] <= self.ttl_for(path)
+
+    async def lookup(self, path):
+        """Return (body, state) where state is 'fresh' or 'stale', or (None, None) when unusable
+
+        A path Jikan recently answered with 404 gives (None, 'missing').
+        """
+        if self.is_missing(path):
+            self.metrics['not_found_hits'] += 1
+            return None, 'missing'
+
+        entry = await self.get(path)
+        if entry is None:
+            return None, None
+
+        body, fetched_at = entry
+        age = time.time() - fetched_at
+        ttl = self.ttl_for(path)
+        if age <= ttl:
+            return body, 'fresh'
+        if age <= ttl + self.stale_ttl:
+            self.metrics['stale_served'] += 1
+            return body, 'stale'
+
+        self.metrics['expired'] += 1
+        return None, None
+
+    def refresh_in_background(self, path, fetch):
+        """Re-fetch path once in the background; concurrent calls share the same task
+
+        fetch(path) stores a 200 answer itself, as fetch_into_cache does, so the
+        refresh joins any identical fetch already in flight.
+        """
+        if path in self.refreshing:
+            return
+
+        async def refresh():
+            try:
+                response = await fetch(path)
+                if response.status_code == 200:
+                    self.metrics['refreshes'] += 1
+                else:
+                    self.metrics['refresh_errors'] += 1
+            except Exception as e:
+                self.metrics['refresh_errors'] += 1
+                print(f"Jikan cache refresh failed for {path}: {e}")
+            finally:
+                self.refreshing.pop(path, None)
+
+        self.refreshing[path] = asyncio.create_task(refresh())
+
+    def stats(self):
+        lookups = self.metrics['memory_hits'] + self.metrics['disk_hits'] + self.metrics['misses']
+        disk_items = 0
+        if self.db is not None:
+            row = self._query("SELECT COUNT(*) FROM jikan_cache")
+            disk_items = row[0] if row is not None else 0
+        return {
+            **self.metrics,
+            'hit_rate': (lookups - self.metrics['misses']) / lookups if lookups else 0,
+            'memory_items': len(self.memory),
+            'not_found_items': len(self.not_found),
+            'disk_items': disk_items,
+            'refreshing': len(self.refreshing),
+        }
+
+    async def close(self):
+        for task in list(self.refreshing.values()):
+            task.cancel()
+        if self.refreshing:
+            await asyncio.gather(*self.refreshing.values(), return_exceptions=True)
+        if self.db is not None:
+            with self.db_lock:
+                self.db.close()
+                self.db = None
+
+jikan_cache = None
+
+def get_jikan_cache():
+    global jikan_cache
+    if jikan_cache is None:
+        jikan_cache = JikanCache(
+            path=JIKAN_CACHE_PATH,
+            memory_items=JIKAN_CACHE_MEMORY_ITEMS,
+            ttls=JIKAN_CACHE_TTLS,
+            default_ttl=JIKAN_CACHE_DEFAULT_TTL,
+            stale_ttl=JIKAN_CACHE_STALE_TTL,
+            not_found_ttl=JIKAN_CACHE_NOT_FOUND_TTL,
+        )
+    return jikan_cache
+
+async def close_jikan_cache():
+    global jikan_cache
+    if jikan_cache is not None:
+        await jikan_cache.close()
+        jikan_cache = None
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one outstanding task
+
+    A caller only joins a task started at its own priority or a more urgent
+    one; an interactive miss never waits behind a background fetch that sits
+    in the rate limiter queue with a longer deadline. It starts its own task
+    instead, which later callers then join.
+    """
+
+    def __init__(self):
+        self.inflight = {}
+        self.metrics = {'leaders': 0, 'shared': 0}
+
+    def _finish(self, key, task):
+        if self.inflight.get(key, (None, None))[1] is task:
+            del self.inflight[key]
+        # Mark the result as retrieved even if every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key, fn, priority=PRIORITY_DEFAULT):
+        leader_priority, task = self.inflight.get(key, (None, None))
+        if task is None or leader_priority > priority:
+            self.metrics['leaders'] += 1
+            task = asyncio.ensure_future(fn())
+            self.inflight[key] = (priority, task)
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.metrics['shared'] += 1
+        # A cancelled waiter must not cancel the fetch the others are waiting on
+        return await asyncio.shield(task)
+
+    def stats(self):
+        return {**self.metrics, 'inflight': len(self.inflight)}
+
+jikan_flight = SingleFlight()
+
+def cached_response(body):
+    return httpx.Response(200, content=body, headers={"content-type": "application/json"})
+
+async def cached_jikan_get(path, priority=PRIORITY_DEFAULT):
+    """jikan_get through the response cache
+
+    Fresh entries are returned directly; stale ones are returned immediately
+    while a background task refreshes them. Concurrent misses for the same
+    path share one upstream request. Only 200 responses are stored; a 404 is
+    remembered for a short while and answered without calling Jikan. When
+    Jikan is down or the breaker is open, an expired entry is still served.
+    """
+    cache = get_jikan_cache()
+    body, state = await cache.lookup(path)
+    if state == 'missing':
+        return httpx.Response(404, json={"status": 404, "message": "Resource does not exist (cached)"})
+    if state == 'stale':
+        cache.refresh_in_background(path, partial(fetch_into_cache, priority=PRIORITY_BACKGROUND))
+    if body is not None:
+        return cached_response(body)
+
+    try:
+        response = await fetch_into_cache(path, priority)
+    except HTTPException as e:
+        if not is_upstream_failure(e.status_code):
+            raise
+        # Upstream is unhealthy: any cached copy, however old, beats an error
+        entry = await cache.get(path)
+        if entry is None:
+            raise
+        return cached_response(entry[0])
+
+    if is_upstream_failure(response.status_code):
+        entry = await cache.get(path)
+        if entry is not None:
+            return cached_response(entry[0])
+    return response
+
+async def fetch_into_cache(path, priority=PRIORITY_DEFAULT):
+    """Fetch path from Jikan (coalesced with identical in-flight fetches) and store a 200 or 404 answer"""
+    async def fetch_and_store():
+        response = await jikan_get(path, priority)
+        if response.status_code == 200:
+            await get_jikan_cache().set(path, response.content)
+        elif response.status_code == 404:
+            get_jikan_cache().set_missing(path)
+        return response
+
+    return await jikan_flight.do(path, fetch_and_store, priority)
+
+# =============================================================================
+# BACKGROUND PREFETCH OF HOT DETAIL PAGES
+# =============================================================================
+
+# Titles prefetched per cycle (0 disables the job)
+JIKAN_PREFETCH_LIMIT = int(os.getenv('JIKAN_PREFETCH_LIMIT', '200'))
+# Upstream requests per minute the job may spend, on top of the shared limiter
+JIKAN_PREFETCH_PER_MINUTE = float(os.getenv('JIKAN_PREFETCH_PER_MINUTE', '20'))
+JIKAN_PREFETCH_START_DELAY = float(os.getenv('JIKAN_PREFETCH_START_DELAY', '30'))
+JIKAN_PREFETCH_INTERVAL = float(os.getenv('JIKAN_PREFETCH_INTERVAL', str(6 * 3600)))
+# Titles are ranked by log(members) + weight * log(views): with 2, doubling a title's
+# recent views moves it as far up as quadrupling its members
+JIKAN_PREFETCH_VIEW_WEIGHT = float(os.getenv('JIKAN_PREFETCH_VIEW_WEIGHT', '2'))
+
+# Detail page views since startup, decayed after every prefetch cycle
+detail_access_counts = Counter()
+
+def record_detail_access(kind, item_id):
+    # Only titles in the local dataset, so unknown ids can neither grow the counter nor take prefetch slots
+    if item_id in get_local_detail_index(kind).positions:
+        detail_access_counts[(kind, item_id)] += 1
+
+class JikanPrefetcher:
+    """Periodically warms the Jikan cache for the most popular and most viewed titles"""
+
+    ENDPOINTS = ['full', 'recommendations']
+
+    def __init__(self, limit, per_minute, start_delay=0, interval=None):
+        self.limit = limit
+        self.per_minute = per_minute
+        self.start_delay = start_delay
+        self.interval = interval
+        self.task = None
+        self.status = {
+            'state': 'idle',
+            'cycle': 0,
+            'total': 0,
+            'processed': 0,
+            'fetched': 0,
+            'skipped': 0,
+            'errors': 0,
+            'current': None,
+            'started_at': None,
+            'finished_at': None,
+        }
+
+    def ranked_targets(self):
+        """Titles across anime and manga ranked by members and recent views combined"""
+        titles = pd.concat([
+            pd.DataFrame({'kind': kind, 'mal_id': pd.to_numeric(df['mal_id'], errors='coerce'),
+                          'members': pd.to_numeric(df['members'], errors='coerce')})
+            for df, kind in [(anime_df, 'anime'), (manga_df, 'manga')]
+        ], ignore_index=True).dropna(subset=['mal_id'])
+        titles['mal_id'] = titles['mal_id'].astype(int)
+        titles = titles.drop_duplicates(subset=['kind', 'mal_id'])
+        views = np.array([detail_access_counts.get(key, 0)
+                          for key in zip(titles['kind'], titles['mal_id'].tolist())], dtype=float)
+        titles['priority'] = (np.log1p(titles['members'].fillna(0).clip(lower=0))
+                              + JIKAN_PREFETCH_VIEW_WEIGHT * np.log1p(views))
+        ranked = titles.nlargest(self.limit, 'priority')
+        return list(zip(ranked['kind'], ranked['mal_id'].tolist()))
+
+    async def run_cycle(self):
+        cache = get_jikan_cache()
+        targets = self.ranked_targets()
+        self.status.update({
+            'state': 'running',
+            'cycle': self.status['cycle'] + 1,
+            'total': len(targets),
+            'processed': 0,
+            'fetched': 0,
+            'skipped': 0,
+            'errors': 0,
+            'started_at': time.time(),
+            'finished_at': None,
+        })
+        for kind, item_id in targets:
+            self.status['current'] = f"{kind}/{item_id}"
+            for endpoint in self.ENDPOINTS:
+                path = f"/{kind}/{item_id}/{endpoint}"
+                if cache.is_missing(path) or await cache.is_fresh(path):
+                    self.status['skipped'] += 1
+                    continue
+                try:
+                    response = await fetch_into_cache(path, PRIORITY_BACKGROUND)
+                    self.status['fetched' if response.status_code == 200 else 'errors'] += 1
+                except HTTPException:
+                    self.status['errors'] += 1
+                await asyncio.sleep(60 / self.per_minute)
+            self.status['processed'] += 1
+
+        # Halve the view counts so "recent" fades over a few cycles
+        for key in list(detail_access_counts):
+            detail_access_counts[key] //= 2
+            if not detail_access_counts[key]:
+                del detail_access_counts[key]
+        self.status.update({'state': 'idle', 'current': None, 'finished_at': time.time()})
+
+    async def run(self):
+        try:
+            await asyncio.sleep(self.start_delay)
+            while True:
+                try:
+                    await self.run_cycle()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"Jikan prefetch cycle failed: {e}")
+                    self.status.update({'state': 'failed', 'current': None, 'finished_at': time.time()})
+                if not self.interval:
+                    break
+                await asyncio.sleep(self.interval)
+        except asyncio.CancelledError:
+            self.status.update({'state': 'stopped', 'current': None})
+            raise
+
+    def start(self):
+        if self.limit > 0 and self.per_minute > 0 and self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+jikan_prefetcher = JikanPrefetcher(
+    limit=JIKAN_PREFETCH_LIMIT,
+    per_minute=JIKAN_PREFETCH_PER_MINUTE,
+    start_delay=JIKAN_PREFETCH_START_DELAY,
+    interval=JIKAN_PREFETCH_INTERVAL,
+)
+
+@app.get("/jikan/prefetch")
+def get_jikan_prefetch_status():
+    """Progress of the background Jikan prefetch job"""
+    return {
+        **jikan_prefetcher.status,
+        'limit': jikan_prefetcher.limit,
+        'per_minute': jikan_prefetcher.per_minute,
+        'enabled': jikan_prefetcher.task is not None,
+    }
+
+@app.get("/jikan/metrics")
+def get_jikan_metrics():
+    """Cache, request-coalescing, rate-limiter and circuit-breaker counters for the Jikan proxy"""
+    return {
+        "cache": get_jikan_cache().stats(),
+        "single_flight": jikan_flight.stats(),
+        "rate_limiter": jikan_limiter.stats(),
+        "circuit_breaker": jikan_breaker.stats(),
+    }
+
+async def timed_jikan_get(path, timings, name):
+    """Interactive cached_jikan_get that records its wall time in milliseconds under timings[name]"""
+    start = time.perf_counter()
+    try:
+        return await cached_jikan_get(path, PRIORITY_INTERACTIVE)
+    finally:
+        timings[name] = (time.perf_counter() - start) * 1000
+
+def server_timing_header(timings):
+    return ", ".join(f"{name};dur={duration:.1f}" for name, duration in timings.items())
+
+async def fetch_detail_with_recommendations(kind, item_id):
+    """Fetch /full and /recommendations concurrently
+
+    A failed recommendations call degrades to an empty list so the detail
+    data is still returned. Returns (detail, recommendations, timings).
+    """
+    timings = {}
+    detail_result, rec_result = await asyncio.gather(
+        timed_jikan_get(f"/{kind}/{item_id}/full", timings, "jikan-full"),
+        timed_jikan_get(f"/{kind}/{item_id}/recommendations", timings, "jikan-recommendations"),
+        return_exceptions=True,
+    )
+
+    if isinstance(detail_result, BaseException):
+        if isinstance(detail_result, HTTPException):
+            # Keep Retry-After from a breaker or queue-full 503
+            detail_result.headers = {**(detail_result.headers or {}), "Server-Timing": server_timing_header(timings)}
+        raise detail_result
+    if detail_result.status_code != 200:
+        raise HTTPException(
+            status_code=detail_result.status_code,
+            detail=f"{kind.capitalize()} not found",
+            headers={"Server-Timing": server_timing_header(timings)},
+        )
+
+    recommendations = []
+    if isinstance(rec_result, BaseException):
+        print(f"Recommendations fetch failed for {kind} {item_id}: {rec_result}")
+    elif rec_result.status_code == 200:
+        try:
+            recommendations = rec_result.json().get("data", [])
+        except ValueError as e:
+            print(f"Recommendations parse error for {kind} {item_id}: {e}")
+
+    return detail_result.json().get("data", {}), recommendations, timings
+
+# =============================================================================
+# LOCAL-FIRST DETAIL RECORDS
+# =============================================================================
+
+class LocalDetailIndex:
+    """Per-id detail records built from a dataframe row in the shape Jikan's /full uses"""
+
+    def __init__(self, df):
+        self.df = df
+        ids = pd.to_numeric(df['mal_id'], errors='coerce')
+        valid = ids.notna().to_numpy()
+        # First row wins for duplicated ids
+        self.positions = dict(zip(ids[valid].astype(int).tolist()[::-1], np.flatnonzero(valid).tolist()[::-1]))
+        self.records = {}
+
+    @staticmethod
+    def _parse_value(value):
+        """JSON-like strings become lists/dicts, NaN becomes None, the rest is kept"""
+        if isinstance(value, str) and value[:1] in ('[', '{'):
+            try:
+                return json.loads(value)
+            except json.JSONDecodeError:
+                try:
+                    return ast.literal_eval(value)
+                except (ValueError, SyntaxError):
+                    return value
+        if isinstance(value, np.generic):
+            value = value.item()
+        return safe_value(value)
+
+    def get(self, mal_id):
+        """Detail record for mal_id, or None when it is not in the local dataset"""
+        if mal_id in self.records:
+            return self.records[mal_id]
+
+        position = self.positions.get(mal_id)
+        if position is None:
+            return None
+
+        row = self.df.iloc[position]
+        record = {column: self._parse_value(value) for column, value in row.items()}
+        record['mal_id'] = int(mal_id)
+
+        # Nested fields the detail page reads from Jikan
+        if 'aired' not in record and 'aired_from' in record:
+            record['aired'] = {'from': record.get('aired_from'), 'to': record.get('aired_to')}
+        if 'published' not in record and 'published_from' in record:
+            record['published'] = {'from': record.get('published_from'), 'to': record.get('published_to')}
+        if 'broadcast' not in record and 'broadcast_day' in record:
+            record['broadcast'] = {'day': record.get('broadcast_day'), 'time': record.get('broadcast_time')}
+
+        self.records[mal_id] = record
+        return record
+
+local_detail_indexes = {}
+
+def get_local_detail_index(kind):
+    if kind not in local_detail_indexes:
+        local_detail_indexes[kind] = LocalDetailIndex(anime_df if kind == 'anime' else manga_df)
+    return local_detail_indexes[kind]
 
-        detail_data = detail_response.json()
+async def cached_jikan_data(path, default, refresh=True):
+    """The data field of a cached Jikan payload without waiting on the upstream
 
-        rec_response = await client.get(f"{JIKAN_BASE_URL}/anime/{anime_id}/recommendations")
-        rec_data = rec_response.json() if rec_response.status_code == 200 else {"data": []}
+    With refresh, an absent or stale entry is (re)fetched in the background so
+    a later request can pick it up. Returns (data, state) with state 'fresh',
+    'stale', 'pending', or 'missing' while Jikan's last answer was a 404.
+    """
+    cache = get_jikan_cache()
+    body, state = await cache.lookup(path)
+    if state == 'missing':
+        return default, state
+    if refresh and state != 'fresh':
+        cache.refresh_in_background(path, partial(fetch_into_cache, priority=PRIORITY_BACKGROUND))
+    if body is None:
+        return default, 'pending'
+    try:
+        return json.loads(body).get("data", default), state
+    except (ValueError, AttributeError):
+        return default, 'pending'
+
+async def local_detail_response(kind, item_id, refresh=True):
+    """Detail response built from the local dataset, enriched with whatever Jikan data is cached
+
+    Pass refresh=False when answering for a failed upstream, so no background
+    fetches are queued against it.
+    """
+    start = time.perf_counter()
+    record = get_local_detail_index(kind).get(item_id)
+    if record is None:
+        return None
+
+    full_data, full_state = await cached_jikan_data(f"/{kind}/{item_id}/full", {}, refresh)
+    recommendations, rec_state = await cached_jikan_data(f"/{kind}/{item_id}/recommendations", [], refresh)
+    detail = {**record, **full_data} if isinstance(full_data, dict) else record
 
     result = {
-        "anime": detail_data.get("data", {}),
-        "recommendations": rec_data.get("data", []),
+        kind: detail,
+        "recommendations": recommendations,
+        "source": "local",
+        "enrichment": {"full": full_state, "recommendations": rec_state},
     }
+    timings = {"local": (time.perf_counter() - start) * 1000}
+    return JSONResponse(content=result, headers={"Server-Timing": server_timing_header(timings)})
 
-    return JSONResponse(content=result)
+@app.get("/anime/{anime_id}")
+async def get_anime_detail(anime_id: int, source: Literal["jikan", "local"] = "jikan"):
+    record_detail_access("anime", anime_id)
+    if source == "local":
+        response = await local_detail_response("anime", anime_id)
+        if response is not None:
+            return response
 
-@app.get("/manga")
-def get_manga(
-    limit: int = 20,
-    offset: int = 0,
+    try:
+        detail_data, recommendations, timings = await fetch_detail_with_recommendations("anime", anime_id)
+    except HTTPException as e:
+        # Jikan is down or the breaker is open: fall back to the local dataset
+        response = await local_detail_response("anime", anime_id, refresh=False) if is_upstream_failure(e.status_code) else None
+        if response is None:
+            raise
+        return response
+
+    result = {
+        "anime": detail_data,
+        "recommendations": recommendations,
+    }
+
+    return JSONResponse(content=result, headers={"Server-Timing": server_timing_header(timings)})
+
+def filter_manga(
+    df,
     search: str = None,
     genre: str = None,
     type: str = None,
@@ -481,16 +1557,20 @@ def get_manga(
     max_chapters: int = None,
     min_volumes: int = None,
     max_volumes: int = None,
-    year: int = None,  
+    year: int = None,
+    franchise: int = None,
 ):
-    df = manga_df.copy()
+    """Apply the /manga listing filters to df and return the matching rows"""
+    # --- Franchise filter (ids from /franchises) ---
+    if franchise is not None:
+        df = df[df['mal_id'].isin(get_franchise_index().member_mal_ids(franchise, 'manga'))]
 
     # --- Search filter ---
     if search:
         search_mask = (
-            df['title'].str.contains(search, case=False, na=False) |
-            df['title_english'].str.contains(search, case=False, na=False) |
-            df['title_japanese'].str.contains(search, case=False, na=False)
+            df['title'].str.contains(search, case=False, na=False, regex=False) |
+            df['title_english'].str.contains(search, case=False, na=False, regex=False) |
+            df['title_japanese'].str.contains(search, case=False, na=False, regex=False)
         )
         df = df[search_mask]
 
@@ -604,6 +1684,37 @@ def get_manga(
     if max_volumes is not None:
         df = df[df['volumes'] <= max_volumes]
 
+    return df
+
+@app.get("/manga")
+def get_manga(
+    limit: int = 20,
+    offset: int = 0,
+    search: str = None,
+    genre: str = None,
+    type: str = None,
+    status: str = None,
+    min_score: float = None,
+    demographic: str = None,
+    theme: str = None,
+    author: str = None,
+    serialization: str = None,
+    publishing: bool = None,
+    min_chapters: int = None,
+    max_chapters: int = None,
+    min_volumes: int = None,
+    max_volumes: int = None,
+    year: int = None,  
+    franchise: int = None,
+):
+    df = filter_manga(
+        manga_df.copy(),
+        search=search, genre=genre, type=type, status=status, min_score=min_score,
+        demographic=demographic, theme=theme, author=author, serialization=serialization,
+        publishing=publishing, min_chapters=min_chapters, max_chapters=max_chapters,
+        min_volumes=min_volumes, max_volumes=max_volumes, year=year, franchise=franchise,
+    )
+
     # --- Sort by score ---
     df = df.sort_values(by=['score'], ascending=False, na_position='last')
 
@@ -802,191 +1913,1672 @@ def get_manga_filters():
     }
 
 @app.get("/manga/{manga_id}")
-async def get_manga_detail(manga_id: int):
-    async with httpx.AsyncClient() as client:
-        detail_response = await client.get(f"{JIKAN_BASE_URL}/manga/{manga_id}/full")
-        if detail_response.status_code != 200:
-            raise HTTPException(status_code=detail_response.status_code, detail="Manga not found")
+async def get_manga_detail(manga_id: int, source: Literal["jikan", "local"] = "jikan"):
+    record_detail_access("manga", manga_id)
+    if source == "local":
+        response = await local_detail_response("manga", manga_id)
+        if response is not None:
+            return response
 
-        detail_data = detail_response.json()
-
-        rec_response = await client.get(f"{JIKAN_BASE_URL}/manga/{manga_id}/recommendations")
-        rec_data = rec_response.json() if rec_response.status_code == 200 else {"data": []}
+    try:
+        detail_data, recommendations, timings = await fetch_detail_with_recommendations("manga", manga_id)
+    except HTTPException as e:
+        # Jikan is down or the breaker is open: fall back to the local dataset
+        response = await local_detail_response("manga", manga_id, refresh=False) if is_upstream_failure(e.status_code) else None
+        if response is None:
+            raise
+        return response
 
     result = {
-        "manga": detail_data.get("data", {}),
-        "recommendations": rec_data.get("data", []),
+        "manga": detail_data,
+        "recommendations": recommendations,
     }
 
-    return JSONResponse(content=result)
+    return JSONResponse(content=result, headers={"Server-Timing": server_timing_header(timings)})
+
+# =============================================================================
+# LOCAL IMAGE INDEX
+# =============================================================================
+
+INT64_MIN, INT64_MAX = int(np.iinfo(np.int64).min), int(np.iinfo(np.int64).max)
+
+class ImageIndex:
+    """Image URLs from a dataframe's images column, in arrays sorted by mal_id"""
+
+    JPG_FIELDS = ['image_url', 'large_image_url', 'small_image_url']
+
+    def __init__(self, df):
+        ids = pd.to_numeric(df['mal_id'], errors='coerce').to_numpy()
+        images = [self._parse_images(value) for value in df['images']]
+
+        valid = ~np.isnan(ids)
+        order = np.argsort(ids[valid], kind='stable')
+        sorted_ids = ids[valid][order].astype(np.int64)
+        rows = np.flatnonzero(valid)[order]
+        # Keep the first row for duplicated ids
+        first = np.ones(len(sorted_ids), dtype=bool)
+        first[1:] = sorted_ids[1:] != sorted_ids[:-1]
+
+        self.ids = sorted_ids[first]
+        rows = rows[first]
+        self.jpg = {
+            field: np.array([images[row][0].get(field) for row in rows], dtype=object)
+            for field in self.JPG_FIELDS
+        }
+        preferred = [images[row][1] for row in rows]
+        self.image_url = np.array([urls[0] for urls in preferred], dtype=object)
+        self.thumbnail_url = np.array([urls[1] for urls in preferred], dtype=object)
+
+    @staticmethod
+    def _parse_images(value):
+        """Return (jpg dict, (preferred image_url, thumbnail_url)) for one images field"""
+        try:
+            images = json.loads(value) if isinstance(value, str) else value
+        except (json.JSONDecodeError, TypeError):
+            images = None
+        if not isinstance(images, dict):
+            return {}, (None, None)
+        jpg = images.get('jpg') if isinstance(images.get('jpg'), dict) else {}
+        return jpg, extract_image_urls(images)
+
+    def positions(self, mal_ids):
+        """Array positions for the given ids, -1 where an id is not indexed"""
+        # Ids beyond int64 cannot be indexed; they are looked up as a value no row has
+        in_range = np.array([INT64_MIN <= mal_id <= INT64_MAX for mal_id in mal_ids], dtype=bool)
+        mal_ids = np.array([mal_id if ok else 0 for mal_id, ok in zip(mal_ids, in_range)], dtype=np.int64)
+        if len(self.ids) == 0:
+            return np.full(len(mal_ids), -1)
+        positions = np.minimum(np.searchsorted(self.ids, mal_ids), len(self.ids) - 1)
+        return np.where(in_range & (self.ids[positions] == mal_ids), positions, -1)
+
+    def jpg_urls(self, mal_id):
+        """jpg image URLs for one id, or None when the id or its images are missing locally"""
+        position = self.positions([mal_id])[0]
+        if position < 0:
+            return None
+        urls = {field: self.jpg[field][position] for field in self.JPG_FIELDS}
+        return urls if any(urls.values()) else None
+
+    def lookup(self, mal_ids):
+        """(image_url, thumbnail_url) per id in one vectorized pass, (None, None) when missing"""
+        positions = self.positions(mal_ids)
+        found = positions >= 0
+        image_urls = np.full(len(positions), None, dtype=object)
+        thumbnail_urls = np.full(len(positions), None, dtype=object)
+        image_urls[found] = self.image_url[positions[found]]
+        thumbnail_urls[found] = self.thumbnail_url[positions[found]]
+        return list(zip(image_urls.tolist(), thumbnail_urls.tolist()))
+
+image_indexes = {}
+
+def get_image_index(kind):
+    if kind not in image_indexes:
+        image_indexes[kind] = ImageIndex(anime_df if kind == 'anime' else manga_df)
+    return image_indexes[kind]
+
+MAX_BULK_IMAGE_IDS = 500
+
+class BulkImageRequest(BaseModel):
+    anime_ids: List[int] = []
+    manga_ids: List[int] = []
+
+@app.post("/images")
+def get_bulk_images(request: BulkImageRequest):
+    """Image and thumbnail URLs for many anime and/or manga ids in one response"""
+    if len(request.anime_ids) + len(request.manga_ids) > MAX_BULK_IMAGE_IDS:
+        raise HTTPException(status_code=400, detail=f"Too many ids (max {MAX_BULK_IMAGE_IDS})")
+
+    result = {}
+    missing = {}
+    for kind, mal_ids in [('anime', request.anime_ids), ('manga', request.manga_ids)]:
+        urls = get_image_index(kind).lookup(mal_ids) if mal_ids else []
+        result[kind] = [
+            {"id": mal_id, "image_url": image_url, "thumbnail_url": thumbnail_url}
+            for mal_id, (image_url, thumbnail_url) in zip(mal_ids, urls)
+        ]
+        missing[kind] = [mal_id for mal_id, (image_url, _) in zip(mal_ids, urls) if image_url is None]
+    result["missing"] = missing
+    return result
+
+@app.get("/anime/{anime_id}/image")
+async def get_anime_image(anime_id: int):
+    local_urls = get_image_index('anime').jpg_urls(anime_id)
+    if local_urls is not None:
+        return JSONResponse(content={"id": anime_id, **local_urls}, headers={"X-Image-Source": "local"})
+
+    response = await cached_jikan_get(f"/anime/{anime_id}/pictures")
+
+    if response.status_code != 200:
+        raise HTTPException(status_code=response.status_code, detail="Anime not found")
+
+    data = response.json()
+
+    if "data" not in data or not data["data"]:
+        raise HTTPException(status_code=404, detail="No images found for this anime")
+
+    first_img = data["data"][0]["jpg"]
+
+    return JSONResponse(content={
+        "id": anime_id,
+        "image_url": first_img.get("image_url"),
+        "large_image_url": first_img.get("large_image_url"),
+        "small_image_url": first_img.get("small_image_url"),
+    }, headers={"X-Image-Source": "jikan"})
+
+@app.get("/manga/{manga_id}/image")
+async def get_manga_image(manga_id: int):
+    local_urls = get_image_index('manga').jpg_urls(manga_id)
+    if local_urls is not None:
+        return JSONResponse(content={
+            "id": manga_id,
+            "image_url": local_urls["large_image_url"],
+            "thumbnail_url": local_urls["image_url"]
+        }, headers={"X-Image-Source": "local"})
+
+    response = await cached_jikan_get(f"/manga/{manga_id}/full")
+
+    if response.status_code != 200:
+        raise HTTPException(status_code=response.status_code, detail="Manga not found")
+    
+    data = response.json().get("data", {})
+    
+    image_url = data.get("images", {}).get("jpg", {}).get("large_image_url")
+    thumbnail_url = data.get("images", {}).get("jpg", {}).get("image_url")
+
+    return JSONResponse(content={
+        "id": manga_id,
+        "image_url": image_url,
+        "thumbnail_url": thumbnail_url
+    }, headers={"X-Image-Source": "jikan"})
+
+# =============================================================================
+# DATASET VERSION & PRECOMPUTED RESPONSES
+# =============================================================================
+
+import gzip
+import hashlib
+from fastapi import Depends, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response, StreamingResponse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+dataset_version = None
+
+def get_dataset_version():
+    """Short content hash of anime_df and manga_df; caches of derived data are keyed by it"""
+    global dataset_version
+    if dataset_version is None:
+        digest = hashlib.sha1()
+        for df in (anime_df, manga_df):
+            digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+        dataset_version = digest.hexdigest()[:16]
+    return dataset_version
+
+class PrecomputedResponse:
+    """A JSON payload encoded once and compressed once, served with an ETag"""
+
+    def __init__(self, content, version, media_type="application/json"):
+        if isinstance(content, bytes):
+            self.body = content
+        else:
+            # Same encoding JSONResponse uses
+            self.body = json.dumps(content, ensure_ascii=False, allow_nan=False,
+                                   indent=None, separators=(",", ":")).encode("utf-8")
+        self.media_type = media_type
+        self.etag = f'"{version}-{hashlib.sha1(self.body).hexdigest()[:16]}"'
+        self.encoded = {'gzip': gzip.compress(self.body, compresslevel=6, mtime=0)}
+        if brotli is not None:
+            self.encoded['br'] = brotli.compress(self.body, quality=5)
+
+    def respond(self, request):
+        headers = {"ETag": self.etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+        if self.etag in request.headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=headers)
+
+        accepted = request.headers.get("accept-encoding", "")
+        for encoding in ('br', 'gzip'):
+            if encoding in self.encoded and encoding in accepted:
+                return Response(self.encoded[encoding], media_type=self.media_type,
+                                headers={**headers, "Content-Encoding": encoding})
+        return Response(self.body, media_type=self.media_type, headers=headers)
+
+# =============================================================================
+# RELATION GRAPH
+# =============================================================================
+
+class RelationGraph:
+    """Relations of anime_df and manga_df as integer node ids and typed edge arrays"""
+
+    def __init__(self, anime_df, manga_df):
+        self.node_ids = {}
+        self.type_names = []
+        self.relation_names = []
+        type_codes = {}
+        relation_codes = {}
+        node_types, node_mal_ids, labels, urls = [], [], [], []
+        sources, targets, relations = [], [], []
+
+        def add_node(mal_id, name, ntype, url=None):
+            key = (ntype, int(mal_id))
+            node = self.node_ids.get(key)
+            if node is None:
+                if ntype not in type_codes:
+                    type_codes[ntype] = len(self.type_names)
+                    self.type_names.append(ntype)
+                node = len(node_mal_ids)
+                self.node_ids[key] = node
+                node_types.append(type_codes[ntype])
+                node_mal_ids.append(int(mal_id))
+                labels.append(safe_value(name))
+                urls.append(safe_value(url))
+            return node
+
+        for df, ntype in [(anime_df, "anime"), (manga_df, "manga")]:
+            titles = df["title"] if "title" in df.columns else pd.Series("", index=df.index)
+            row_urls = df["url"] if "url" in df.columns else pd.Series("", index=df.index)
+            row_relations = df["relations"] if "relations" in df.columns else pd.Series(np.nan, index=df.index)
+
+            for mal_id, title, url, relations_field in zip(df["mal_id"], titles, row_urls, row_relations):
+                source = add_node(mal_id, title, ntype, url)
+                if not isinstance(relations_field, str):
+                    continue
+                try:
+                    rels = json.loads(relations_field.replace("'", '"'))
+                    for rel in rels:
+                        relation_type = rel.get("relation", "")
+                        for entry in rel.get("entry", []):
+                            target_type = entry.get("type", "").lower()
+                            target = add_node(entry["mal_id"], entry.get("name", ""), target_type, entry.get("url", ""))
+
+                            if relation_type not in relation_codes:
+                                relation_codes[relation_type] = len(self.relation_names)
+                                self.relation_names.append(relation_type)
+                            sources.append(source)
+                            targets.append(target)
+                            relations.append(relation_codes[relation_type])
+                except Exception:
+                    continue
+
+        self.node_type = np.array(node_types, dtype=np.uint8)
+        self.node_mal_id = np.array(node_mal_ids, dtype=np.int32)
+        self.labels = labels
+        self.urls = urls
+        self.edge_source = np.array(sources, dtype=np.int32)
+        self.edge_target = np.array(targets, dtype=np.int32)
+        self.edge_relation = np.array(relations, dtype=np.uint8)
+
+    @property
+    def node_count(self):
+        return len(self.node_mal_id)
+
+    def node_key(self, node):
+        return f"{self.type_names[self.node_type[node]]}_{self.node_mal_id[node]}"
+
+    def relation_filter(self, relations):
+        """Sorted lower-case names in a comma-separated relation list; 400 for names the graph does not have"""
+        wanted = sorted({name.strip().lower() for name in (relations or '').split(',') if name.strip()})
+        known = {name.lower() for name in self.relation_names}
+        unknown = [name for name in wanted if name not in known]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown relation types: {', '.join(unknown)}; expected any of: {', '.join(self.relation_names)}")
+        return wanted
+
+    def relation_mask(self, relations):
+        """Boolean mask over relation codes for a comma-separated list of relation names, None for all"""
+        wanted = self.relation_filter(relations)
+        if not wanted:
+            return None
+        return np.array([name.lower() in wanted for name in self.relation_names], dtype=bool)
+
+    def subgraph_dict(self, nodes, edge_ids, **columns):
+        """nodes/links JSON (as in to_dict) restricted to the given node and edge ids
+
+        Keyword arguments are extra per-node fields, aligned with nodes.
+        """
+        nodes = np.asarray(nodes).tolist()
+        keys = {node: self.node_key(node) for node in nodes}
+        columns = {name: np.asarray(values).tolist() for name, values in columns.items()}
+        node_list = []
+        for position, node in enumerate(nodes):
+            item = {
+                "id": keys[node],
+                "mal_id": int(self.node_mal_id[node]),
+                "label": self.labels[node],
+                "type": self.type_names[self.node_type[node]],
+                "url": self.urls[node],
+            }
+            for name, values in columns.items():
+                item[name] = values[position]
+            node_list.append(item)
+        links = [
+            {
+                "source": keys[int(self.edge_source[edge])],
+                "target": keys[int(self.edge_target[edge])],
+                "relation": self.relation_names[self.edge_relation[edge]],
+            }
+            for edge in np.asarray(edge_ids).tolist()
+        ]
+        return {"nodes": node_list, "links": links}
+
+    def to_dict(self):
+        """The nodes/links JSON structure served by GET /graph"""
+        keys = [self.node_key(node) for node in range(self.node_count)]
+        nodes = [
+            {"id": key, "mal_id": mal_id, "label": label, "type": self.type_names[type_code], "url": url}
+            for key, mal_id, label, type_code, url in zip(
+                keys, self.node_mal_id.tolist(), self.labels, self.node_type.tolist(), self.urls)
+        ]
+        links = [
+            {"source": keys[source], "target": keys[target], "relation": self.relation_names[relation]}
+            for source, target, relation in zip(
+                self.edge_source.tolist(), self.edge_target.tolist(), self.edge_relation.tolist())
+        ]
+        return {"nodes": nodes, "links": links}
+
+GRAPH_BINARY_MAGIC = b"MALG"
+
+def pack_string_table(strings):
+    """utf-8 blob plus uint32 offsets (len + 1) for a list of optional strings"""
+    encoded = [(value or "").encode("utf-8") for value in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.uint32)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return b"".join(encoded), offsets
+
+def pack_graph_binary(graph):
+    """Relation graph as typed columns in one little-endian buffer
+
+    Layout: magic "MALG", uint32 header length, JSON header, then each column
+    8-byte aligned. Column offsets in the header are relative to the end of
+    the header, which is itself padded to 8 bytes, so every column can be
+    viewed in place as a typed array. Labels and urls are string tables: a
+    utf-8 blob plus uint32 offsets; missing values are empty strings.
+    """
+    label_data, label_offsets = pack_string_table(graph.labels)
+    url_data, url_offsets = pack_string_table(graph.urls)
+    columns = [
+        ("node_type", graph.node_type),
+        ("node_mal_id", graph.node_mal_id),
+        ("edge_source", graph.edge_source),
+        ("edge_target", graph.edge_target),
+        ("edge_relation", graph.edge_relation),
+        ("label_offsets", label_offsets),
+        ("label_data", np.frombuffer(label_data, dtype=np.uint8)),
+        ("url_offsets", url_offsets),
+        ("url_data", np.frombuffer(url_data, dtype=np.uint8)),
+    ]
+
+    layout, chunks, position = {}, [], 0
+    for name, array in columns:
+        data = np.ascontiguousarray(array, dtype=array.dtype.newbyteorder("<")).tobytes()
+        layout[name] = {"dtype": array.dtype.name, "offset": position, "length": len(array)}
+        padding = -len(data) % 8
+        chunks.append(data + b"\0" * padding)
+        position += len(data) + padding
+
+    header = json.dumps({
+        "format": 1,
+        "node_count": graph.node_count,
+        "edge_count": len(graph.edge_source),
+        "types": graph.type_names,
+        "relations": graph.relation_names,
+        "columns": layout,
+    }, separators=(",", ":")).encode("utf-8")
+    header += b" " * (-(len(header) + 8) % 8)
+    return GRAPH_BINARY_MAGIC + np.uint32(len(header)).astype("<u4").tobytes() + header + b"".join(chunks)
+
+class RelationAdjacency:
+    """Undirected CSR adjacency over RelationGraph node ids
+
+    Row i of (indptr, indices) lists the neighbours of node i; edge_ids and
+    relations hold the original edge and its relation code for each slot.
+    """
+
+    def __init__(self, graph):
+        node_count = graph.node_count
+        edge_ids = np.arange(len(graph.edge_source), dtype=np.int32)
+        heads = np.concatenate([graph.edge_source, graph.edge_target])
+        tails = np.concatenate([graph.edge_target, graph.edge_source])
+        order = np.argsort(heads, kind='stable')
+
+        self.indptr = np.zeros(node_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(heads, minlength=node_count), out=self.indptr[1:])
+        self.indices = tails[order]
+        self.edge_ids = np.concatenate([edge_ids, edge_ids])[order]
+        self.relations = graph.edge_relation[self.edge_ids] if len(self.edge_ids) else np.array([], dtype=np.uint8)
+
+    def slots(self, nodes):
+        """Positions in indices/edge_ids/relations covering the rows of the given nodes"""
+        starts = self.indptr[nodes]
+        counts = self.indptr[nodes + 1] - starts
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+        return np.arange(counts.sum(), dtype=np.int64) + offsets
+
+    def bfs(self, root, max_depth, allowed=None):
+        """Nodes within max_depth hops of root and their distance, one vectorized step per level
+
+        allowed is an optional boolean mask over relation codes.
+        """
+        visited = np.zeros(len(self.indptr) - 1, dtype=bool)
+        visited[root] = True
+        frontier = np.array([root], dtype=np.int64)
+        reached = [frontier]
+        depths = [np.zeros(1, dtype=np.int64)]
+
+        for depth in range(1, max_depth + 1):
+            slots = self.slots(frontier)
+            if allowed is not None:
+                slots = slots[allowed[self.relations[slots]]]
+            neighbours = np.unique(self.indices[slots])
+            frontier = neighbours[~visited[neighbours]]
+            if len(frontier) == 0:
+                break
+            visited[frontier] = True
+            reached.append(frontier)
+            depths.append(np.full(len(frontier), depth, dtype=np.int64))
+
+        return np.concatenate(reached), np.concatenate(depths)
+
+    def shortest_path(self, source, target, max_depth, allowed=None):
+        """Node ids and edge ids of a shortest path from source to target, None if none within max_depth
+
+        Bidirectional BFS: each step expands a whole level of the smaller
+        frontier and stops at the first level where the two searches meet.
+        """
+        if source == target:
+            return [source], []
+
+        node_count = len(self.indptr) - 1
+        parents = [np.full(node_count, -1, dtype=np.int64), np.full(node_count, -1, dtype=np.int64)]
+        via = [np.full(node_count, -1, dtype=np.int64), np.full(node_count, -1, dtype=np.int64)]
+        parents[0][source] = source
+        parents[1][target] = target
+        frontiers = [np.array([source], dtype=np.int64), np.array([target], dtype=np.int64)]
+
+        for _ in range(max_depth):
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            frontier = frontiers[side]
+            slots = self.slots(frontier)
+            heads = np.repeat(frontier, self.indptr[frontier + 1] - self.indptr[frontier])
+            if allowed is not None:
+                keep = allowed[self.relations[slots]]
+                slots, heads = slots[keep], heads[keep]
+            neighbours = self.indices[slots]
+            unseen = parents[side][neighbours] < 0
+            neighbours, first = np.unique(neighbours[unseen], return_index=True)
+            if len(neighbours) == 0:
+                return None
+            parents[side][neighbours] = heads[unseen][first]
+            via[side][neighbours] = self.edge_ids[slots[unseen][first]]
+
+            met = neighbours[parents[1 - side][neighbours] >= 0]
+            if len(met):
+                return self.join_path(int(met[0]), parents, via)
+            frontiers[side] = neighbours
+        return None
+
+    @staticmethod
+    def join_path(meet, parents, via):
+        """Walk the two BFS parent trees out from the meeting node"""
+        nodes, edges = [meet], []
+        node = meet
+        while parents[0][node] != node:
+            edges.append(int(via[0][node]))
+            node = int(parents[0][node])
+            nodes.append(node)
+        nodes.reverse()
+        edges.reverse()
+        node = meet
+        while parents[1][node] != node:
+            edges.append(int(via[1][node]))
+            node = int(parents[1][node])
+            nodes.append(node)
+        return nodes, edges
+
+    def subgraph_edges(self, nodes, allowed=None):
+        """Ids of edges with both ends in nodes"""
+        member = np.zeros(len(self.indptr) - 1, dtype=bool)
+        member[nodes] = True
+        slots = self.slots(np.asarray(nodes, dtype=np.int64))
+        keep = member[self.indices[slots]]
+        if allowed is not None:
+            keep &= allowed[self.relations[slots]]
+        return np.unique(self.edge_ids[slots[keep]])
+
+class FranchiseIndex:
+    """Connected components (franchises) of the relation graph via union-find
+
+    allowed optionally restricts the edges to a boolean mask over relation codes.
+    Franchise ids are dense and numbered by the first node of each component,
+    so the same dataset version always yields the same ids.
+    """
+
+    def __init__(self, graph, allowed=None):
+        self.graph = graph
+        parent = list(range(graph.node_count))
+
+        def find(node):
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        keep = np.ones(len(graph.edge_source), dtype=bool) if allowed is None else allowed[graph.edge_relation]
+        for source, target in zip(graph.edge_source[keep].tolist(), graph.edge_target[keep].tolist()):
+            root_a, root_b = find(source), find(target)
+            if root_a != root_b:
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+
+        roots = np.array([find(node) for node in range(graph.node_count)], dtype=np.int32)
+        self.root_nodes, franchise_of = np.unique(roots, return_inverse=True)
+        self.franchise_of = franchise_of.astype(np.int32)
+        self.sizes = np.bincount(self.franchise_of, minlength=len(self.root_nodes))
+        self.type_counts = np.zeros((len(self.root_nodes), len(graph.type_names)), dtype=np.int64)
+        np.add.at(self.type_counts, (self.franchise_of, graph.node_type), 1)
+
+        # Members of each franchise as CSR rows over node ids
+        self.member_nodes = np.argsort(self.franchise_of, kind='stable').astype(np.int32)
+        self.member_indptr = np.zeros(len(self.root_nodes) + 1, dtype=np.int64)
+        np.cumsum(self.sizes, out=self.member_indptr[1:])
+
+    def __len__(self):
+        return len(self.root_nodes)
+
+    def lookup(self, node_type, mal_id):
+        """Franchise id of one title, None if it is not in the graph"""
+        node = self.graph.node_ids.get((node_type, int(mal_id)))
+        return None if node is None else int(self.franchise_of[node])
+
+    def ids_for(self, node_type, mal_ids):
+        """Franchise ids for a sequence of mal_ids of one type, -1 where unknown"""
+        node_ids = self.graph.node_ids
+        nodes = np.array([node_ids.get((node_type, int(mal_id)), -1) for mal_id in mal_ids], dtype=np.int64)
+        return np.where(nodes >= 0, self.franchise_of[nodes], -1)
+
+    def members(self, franchise_id):
+        return self.member_nodes[self.member_indptr[franchise_id]:self.member_indptr[franchise_id + 1]]
+
+    def member_mal_ids(self, franchise_id, node_type):
+        """mal_ids of the franchise's titles of one type"""
+        if not 0 <= franchise_id < len(self) or node_type not in self.graph.type_names:
+            return np.array([], dtype=np.int32)
+        nodes = self.members(franchise_id)
+        type_code = self.graph.type_names.index(node_type)
+        return self.graph.node_mal_id[nodes[self.graph.node_type[nodes] == type_code]]
+
+    def summary(self, franchise_id):
+        root = int(self.root_nodes[franchise_id])
+        counts = self.type_counts[franchise_id].tolist()
+        return {
+            "franchise_id": int(franchise_id),
+            "title": self.graph.labels[root],
+            "root": self.graph.node_key(root),
+            "size": int(self.sizes[franchise_id]),
+            "counts": {type_name: count for type_name, count in zip(self.graph.type_names, counts)},
+        }
+
+class GraphLayout:
+    """2-D positions for every node: a force-directed layout per franchise, franchises packed in rows
+
+    All franchises are simulated at once with Fruchterman-Reingold forces;
+    repulsion is estimated from GRAPH_LAYOUT_SAMPLES random members of the
+    node's own franchise per iteration, so a step costs O(nodes + edges).
+    """
+
+    def __init__(self, graph, franchises, adjacency, seed=0):
+        rng = np.random.default_rng(seed)
+        component = franchises.franchise_of
+        sizes = franchises.sizes[component]
+        starts = franchises.member_indptr[component]
+        node_count = graph.node_count
+
+        # Start inside a disc whose area grows with the franchise size
+        angle = rng.uniform(0, 2 * np.pi, node_count)
+        radius = np.sqrt(sizes * rng.uniform(0, 1, node_count))
+        x, y = radius * np.cos(angle), radius * np.sin(angle)
+
+        loops = graph.edge_source != graph.edge_target
+        sources, targets = graph.edge_source[loops], graph.edge_target[loops]
+        repulsion = np.maximum(sizes - 1, 0) / GRAPH_LAYOUT_SAMPLES
+        movable = sizes > 1
+
+        for iteration in range(GRAPH_LAYOUT_ITERATIONS):
+            dx = np.zeros(node_count)
+            dy = np.zeros(node_count)
+            for _ in range(GRAPH_LAYOUT_SAMPLES):
+                partner = franchises.member_nodes[starts + rng.integers(0, sizes)]
+                delta_x, delta_y = x - x[partner], y - y[partner]
+                scale = repulsion / np.maximum(delta_x ** 2 + delta_y ** 2, 1e-4)
+                dx += delta_x * scale
+                dy += delta_y * scale
+
+            delta_x, delta_y = x[sources] - x[targets], y[sources] - y[targets]
+            distance = np.sqrt(delta_x ** 2 + delta_y ** 2)
+            pull_x, pull_y = delta_x * distance, delta_y * distance
+            dx += np.bincount(targets, pull_x, node_count) - np.bincount(sources, pull_x, node_count)
+            dy += np.bincount(targets, pull_y, node_count) - np.bincount(sources, pull_y, node_count)
+
+            temperature = 0.1 * np.sqrt(sizes) * (1 - iteration / GRAPH_LAYOUT_ITERATIONS) + 0.01
+            length = np.maximum(np.sqrt(dx ** 2 + dy ** 2), 1e-9)
+            step = np.where(movable, np.minimum(length, temperature) / length, 0)
+            x += dx * step
+            y += dy * step
+
+        # Centre each franchise, then pack them largest first into rows of similar width
+        franchise_count = len(franchises)
+        x -= (np.bincount(component, x, franchise_count) / franchises.sizes)[component]
+        y -= (np.bincount(component, y, franchise_count) / franchises.sizes)[component]
+        extent = np.zeros(franchise_count)
+        np.maximum.at(extent, component, np.sqrt(x ** 2 + y ** 2))
+        cell = 2 * extent + GRAPH_LAYOUT_MARGIN
+        row_width = np.sqrt((cell ** 2).sum())
+
+        offset_x, offset_y = np.zeros(franchise_count), np.zeros(franchise_count)
+        cursor_x = cursor_y = row_height = 0.0
+        for franchise_id in np.argsort(-franchises.sizes, kind='stable').tolist():
+            if cursor_x > 0 and cursor_x + cell[franchise_id] > row_width:
+                cursor_x, cursor_y, row_height = 0.0, cursor_y + row_height, 0.0
+            offset_x[franchise_id] = cursor_x + cell[franchise_id] / 2
+            offset_y[franchise_id] = cursor_y + cell[franchise_id] / 2
+            cursor_x += cell[franchise_id]
+            row_height = max(row_height, cell[franchise_id])
+
+        self.x = np.round(x + offset_x[component], 3)
+        self.y = np.round(y + offset_y[component], 3)
+        self.bounds = [float(self.x.min()), float(self.y.min()), float(self.x.max()), float(self.y.max())] \
+            if node_count else [0.0, 0.0, 0.0, 0.0]
+        # Level of detail: best-connected nodes first
+        self.priority = np.argsort(-np.diff(adjacency.indptr), kind='stable')
+
+    def viewport(self, x0, y0, x1, y1, max_nodes):
+        """Nodes inside the box in priority order, at most max_nodes, and how many were inside"""
+        order_x, order_y = self.x[self.priority], self.y[self.priority]
+        visible = self.priority[(order_x >= x0) & (order_x <= x1) & (order_y >= y0) & (order_y <= y1)]
+        return visible[:max_nodes], len(visible)
+
+GRAPH_LAYOUT_ITERATIONS = 80
+GRAPH_LAYOUT_SAMPLES = 8
+GRAPH_LAYOUT_MARGIN = 2.0
+
+# Derived graph structures for the current dataset version, built on first use
+relation_graph_cache = {"version": None}
+relation_graph_lock = threading.RLock()
+
+def get_graph_artifact(name, build):
+    """Memoize build(graph) under name for the current dataset version"""
+    version = get_dataset_version()
+    with relation_graph_lock:
+        if relation_graph_cache["version"] != version:
+            relation_graph_cache.clear()
+            relation_graph_cache["version"] = version
+            relation_graph_cache["graph"] = RelationGraph(anime_df, manga_df)
+        if name not in relation_graph_cache:
+            relation_graph_cache[name] = build(relation_graph_cache["graph"])
+        return relation_graph_cache[name]
+
+def get_relation_graph():
+    return get_graph_artifact("graph", lambda graph: graph)
+
+def build_graph():
+    return get_relation_graph().to_dict()
+
+def get_franchise_index(relations=None):
+    """Franchises for the current dataset version, one index per set of relation types"""
+    # Only relation types the graph has make it into the key, so junk values cannot pile up indexes
+    names = get_relation_graph().relation_filter(relations)
+    return get_graph_artifact(
+        "franchises:" + ",".join(names),
+        lambda graph: FranchiseIndex(graph, graph.relation_mask(",".join(names))),
+    )
+
+def get_graph_response():
+    """/graph payload for the current dataset version, serialized and compressed once"""
+    return get_graph_artifact("response", lambda graph: PrecomputedResponse(graph.to_dict(), get_dataset_version()))
+
+@app.get("/graph")
+def get_graph(request: Request):
+    return get_graph_response().respond(request)
+
+@app.get("/graph/binary")
+def get_graph_binary(request: Request):
+    """/graph as packed typed columns plus string tables (see pack_graph_binary)"""
+    response = get_graph_artifact(
+        "binary", lambda graph: PrecomputedResponse(pack_graph_binary(graph), get_dataset_version(),
+                                                    media_type="application/octet-stream"))
+    return response.respond(request)
+
+GRAPH_STREAM_CHUNK = 2000
+
+def iter_graph_links(graph):
+    """NDJSON lines of the /graph links, GRAPH_STREAM_CHUNK edges per chunk"""
+    type_names = [json.dumps(name, ensure_ascii=False)[1:-1] for name in graph.type_names]
+    relation_names = [json.dumps(name, ensure_ascii=False) for name in graph.relation_names]
+    for start in range(0, len(graph.edge_source), GRAPH_STREAM_CHUNK):
+        sources = graph.edge_source[start:start + GRAPH_STREAM_CHUNK]
+        targets = graph.edge_target[start:start + GRAPH_STREAM_CHUNK]
+        lines = [
+            '{"source":"%s_%d","target":"%s_%d","relation":%s}\n'
+            % (type_names[source_type], source_id, type_names[target_type], target_id, relation_names[relation])
+            for source_type, source_id, target_type, target_id, relation in zip(
+                graph.node_type[sources].tolist(), graph.node_mal_id[sources].tolist(),
+                graph.node_type[targets].tolist(), graph.node_mal_id[targets].tolist(),
+                graph.edge_relation[start:start + GRAPH_STREAM_CHUNK].tolist())
+        ]
+        yield "".join(lines).encode("utf-8")
+
+@app.get("/graph/links")
+def stream_graph_links():
+    """/graph links as newline-delimited JSON, encoded while being sent"""
+    return StreamingResponse(iter_graph_links(get_relation_graph()), media_type="application/x-ndjson")
+
+MAX_SUBGRAPH_DEPTH = 10
+
+MAX_VIEWPORT_NODES = 20000
+
+@app.get("/graph/layout")
+def get_graph_layout(x0: float = None, y0: float = None, x1: float = None, y1: float = None,
+                     max_nodes: int = 2000):
+    """Precomputed node positions inside a bounding box (the whole layout if omitted)
+
+    max_nodes is the level of detail: the best-connected visible nodes are
+    returned first, with the links among them.
+    """
+    if any(value is not None and not math.isfinite(value) for value in (x0, y0, x1, y1)):
+        raise HTTPException(status_code=400, detail="x0, y0, x1 and y1 must be finite numbers")
+    graph = get_relation_graph()
+    adjacency = get_graph_artifact("adjacency", RelationAdjacency)
+    layout = get_graph_artifact(
+        "layout", lambda graph: GraphLayout(graph, get_franchise_index(), adjacency))
+
+    bounds = layout.bounds
+    x0, y0 = bounds[0] if x0 is None else x0, bounds[1] if y0 is None else y0
+    x1, y1 = bounds[2] if x1 is None else x1, bounds[3] if y1 is None else y1
+    nodes, visible_count = layout.viewport(x0, y0, x1, y1, max(0, min(max_nodes, MAX_VIEWPORT_NODES)))
+
+    result = graph.subgraph_dict(nodes, adjacency.subgraph_edges(nodes), x=layout.x[nodes], y=layout.y[nodes])
+    result.update({
+        "bounds": bounds,
+        "viewport": [x0, y0, x1, y1],
+        "visible": visible_count,
+        "truncated": visible_count > len(nodes),
+    })
+    return JSONResponse(content=result)
+
+MAX_PATH_DEPTH = 12
+
+@app.get("/graph/path/{source_type}/{source_id}/{target_type}/{target_id}")
+def get_relation_path(source_type: str, source_id: int, target_type: str, target_id: int,
+                      max_depth: int = 6, relations: str = None):
+    """Shortest chain of relations connecting two titles"""
+    graph = get_relation_graph()
+    source = graph.node_ids.get((source_type.lower(), source_id))
+    target = graph.node_ids.get((target_type.lower(), target_id))
+    if source is None or target is None:
+        raise HTTPException(status_code=404, detail="Node not found in relation graph")
+
+    max_depth = max(0, min(max_depth, MAX_PATH_DEPTH))
+    adjacency = get_graph_artifact("adjacency", RelationAdjacency)
+    path = adjacency.shortest_path(source, target, max_depth, graph.relation_mask(relations))
+    if path is None:
+        return {"found": False, "length": None, "path": [], "nodes": [], "links": [], "max_depth": max_depth}
+
+    nodes, edge_ids = path
+    result = graph.subgraph_dict(nodes, edge_ids)
+    result.update({"found": True, "length": len(edge_ids), "path": [graph.node_key(node) for node in nodes],
+                   "max_depth": max_depth})
+    return result
+
+@app.get("/graph/{node_type}/{mal_id}")
+def get_subgraph(node_type: str, mal_id: int, depth: int = 1, relations: str = None):
+    """Neighbourhood of one title: nodes within depth hops and the relations between them"""
+    graph = get_relation_graph()
+    root = graph.node_ids.get((node_type.lower(), mal_id))
+    if root is None:
+        raise HTTPException(status_code=404, detail="Node not found in relation graph")
+
+    depth = max(0, min(depth, MAX_SUBGRAPH_DEPTH))
+    adjacency = get_graph_artifact("adjacency", RelationAdjacency)
+    allowed = graph.relation_mask(relations)
+    nodes, distances = adjacency.bfs(root, depth, allowed)
+    edge_ids = adjacency.subgraph_edges(nodes, allowed)
+
+    result = graph.subgraph_dict(nodes, edge_ids, depth=distances)
+    result.update({"root": graph.node_key(root), "depth": depth})
+    return JSONResponse(content=result)
+
+MAX_FRANCHISE_PAGE = 100
+
+@app.get("/franchises")
+def get_franchises(limit: int = 20, offset: int = 0, min_size: int = 2, relations: str = None):
+    """Franchises largest first, optionally built from a subset of relation types"""
+    limit = max(1, min(limit, MAX_FRANCHISE_PAGE))
+    offset = max(0, offset)
+    index = get_franchise_index(relations)
+    candidates = np.flatnonzero(index.sizes >= min_size)
+    order = candidates[np.argsort(-index.sizes[candidates], kind='stable')]
+    total_count = len(order)
+
+    return {
+        "count": total_count,
+        "results": [index.summary(franchise_id) for franchise_id in order[offset:offset + limit].tolist()],
+        "pagination": {
+            "limit": limit,
+            "offset": offset,
+            "has_next": offset + limit < total_count,
+            "has_prev": offset > 0
+        }
+    }
+
+@app.get("/franchises/lookup/{node_type}/{mal_id}")
+def lookup_franchise(node_type: str, mal_id: int, relations: str = None):
+    """Franchise of one anime or manga"""
+    index = get_franchise_index(relations)
+    franchise_id = index.lookup(node_type.lower(), mal_id)
+    if franchise_id is None:
+        raise HTTPException(status_code=404, detail="Node not found in relation graph")
+    return index.summary(franchise_id)
+
+@app.get("/franchises/{franchise_id}")
+def get_franchise(franchise_id: int, relations: str = None):
+    """One franchise with all of its titles"""
+    index = get_franchise_index(relations)
+    if not 0 <= franchise_id < len(index):
+        raise HTTPException(status_code=404, detail="Franchise not found")
+
+    graph = index.graph
+    members = index.members(franchise_id)
+    result = index.summary(franchise_id)
+    result["members"] = graph.subgraph_dict(members, [])["nodes"]
+    return result
+
+from scipy import sparse
+
+def parse_stats_json(field):
+    if pd.isna(field):
+        return []
+    try:
+        if isinstance(field, str):
+            return json.loads(field)
+        return field if isinstance(field, list) else []
+    except:
+        return []
+
+def parse_stats_array(field):
+    if pd.isna(field):
+        return []
+    try:
+        if isinstance(field, str):
+            if field.startswith('['):
+                return json.loads(field)
+            else:
+                return [{'name': item.strip()} for item in field.split(',') if item.strip()]
+        return field if isinstance(field, list) else []
+    except:
+        return []
+
+class EntityTable:
+    """A JSON list column exploded to one entry per {'name': ...} item
+
+    Entries are in row-major order: rows holds the row position in the frame,
+    positions the index among the row's named items, codes an index into
+    names. Codes are assigned in order of first appearance, so sorting by
+    code reproduces the insertion order of a dict filled row by row. Each
+    distinct cell string is parsed once.
+    """
+
+    def __init__(self, series, parse):
+        present = series.notna().to_numpy()
+        row_positions = np.flatnonzero(present)
+        cell_codes, cells = pd.factorize(series[present])
+
+        code_of = {}
+        self.names = []
+        cell_entries = []
+        for cell in cells.tolist():
+            entries = []
+            for item in parse(cell):
+                if isinstance(item, dict) and 'name' in item:
+                    name = item['name']
+                    if name not in code_of:
+                        code_of[name] = len(self.names)
+                        self.names.append(name)
+                    entries.append(code_of[name])
+            cell_entries.append(entries)
+
+        cell_lengths = np.array([len(entries) for entries in cell_entries], dtype=np.int64)
+        cell_starts = np.concatenate([[0], np.cumsum(cell_lengths)[:-1]]) if len(cells) else cell_lengths
+        flat_codes = np.array([code for entries in cell_entries for code in entries], dtype=np.int64)
+
+        lengths = cell_lengths[cell_codes]
+        row_starts = np.cumsum(lengths) - lengths
+        self.positions = np.arange(lengths.sum(), dtype=np.int64) - np.repeat(row_starts, lengths)
+        self.rows = np.repeat(row_positions, lengths)
+        self.codes = flat_codes[np.repeat(cell_starts[cell_codes], lengths) + self.positions]
+        self.truthy = np.array([bool(name) for name in self.names], dtype=bool)
+
+    def mask_rows(self, row_mask):
+        """Entry mask for a boolean mask over frame rows"""
+        return row_mask[self.rows]
+
+    def counts(self, mask=None):
+        codes = self.codes if mask is None else self.codes[mask]
+        return np.bincount(codes, minlength=len(self.names))
+
+    def first_seen(self, mask=None):
+        """Codes present under mask, in order of their first entry"""
+        codes = self.codes if mask is None else self.codes[mask]
+        unique_codes, first = np.unique(codes, return_index=True)
+        return unique_codes[np.argsort(first, kind='stable')]
+
+    def count_dict(self, mask=None):
+        """{name: count} for truthy names, in first-appearance order"""
+        counts = self.counts(mask)
+        return {self.names[code]: int(counts[code]) for code in self.first_seen(mask) if self.truthy[code]}
+
+    def score_lists(self, scores, mask):
+        """{code: [score, ...]} for entries under mask, codes in first-appearance order"""
+        codes = self.codes[mask]
+        values = scores[self.rows[mask]]
+        order = np.argsort(codes, kind='stable')
+        boundaries = np.flatnonzero(np.diff(codes[order])) + 1
+        groups = dict(zip(codes[order][np.concatenate([[0], boundaries])].tolist() if len(codes) else [],
+                          np.split(values[order], boundaries)))
+        return {code: groups[code].tolist() for code in self.first_seen(mask).tolist()}
+
+    def entries(self, mask=None):
+        """(rows, positions, codes) of the entries under mask"""
+        if mask is None:
+            return self.rows, self.positions, self.codes
+        return self.rows[mask], self.positions[mask], self.codes[mask]
+
+    def cooccurrence(self, mask=None):
+        """Code x code counts of item pairs (i < j) within a row; the diagonal counts repeated names"""
+        rows, _, codes = self.entries(mask)
+        row_ids = np.unique(rows, return_inverse=True)[1]
+        matrix = sparse.csr_matrix((np.ones(len(codes), dtype=np.int64), (row_ids, codes)),
+                                   shape=(row_ids.max() + 1 if len(row_ids) else 0, len(self.names)))
+        matrix.sum_duplicates()
+        pairs = (matrix.T @ matrix).toarray()
+        repeats = matrix.data * (matrix.data - 1) // 2
+        np.fill_diagonal(pairs, np.bincount(matrix.indices, weights=repeats, minlength=len(self.names)))
+        return np.triu(pairs)
+
+    @staticmethod
+    def first_pair(rows, positions, codes, first, second):
+        """(row, i, j) of the first i < j where items i and j of a row are the given codes"""
+        rows_a, positions_a = rows[codes == first], positions[codes == first]
+        if first == second:
+            repeated = np.flatnonzero(rows_a[1:] == rows_a[:-1])[0]
+            return int(rows_a[repeated]), int(positions_a[repeated]), int(positions_a[repeated + 1])
+        rows_b, positions_b = rows[codes == second], positions[codes == second]
+        row = np.intersect1d(rows_a, rows_b)[0]
+        position_a = positions_a[np.searchsorted(rows_a, row)]
+        position_b = positions_b[np.searchsorted(rows_b, row)]
+        return int(row), int(min(position_a, position_b)), int(max(position_a, position_b))
+
+    def top_pairs(self, limit, mask=None):
+        """{(name, name): count} holding every pair that can reach the top limit, in first-occurrence order"""
+        pairs = self.cooccurrence(mask)
+        first, second = np.nonzero(pairs)
+        counts = pairs[first, second]
+        if len(counts) == 0:
+            return {}
+        threshold = np.sort(counts)[::-1][min(limit, len(counts)) - 1]
+        rows, positions, codes = self.entries(mask)
+        candidates = [(self.first_pair(rows, positions, codes, a, b), a, b, int(count))
+                      for a, b, count in zip(first.tolist(), second.tolist(), counts.tolist()) if count >= threshold]
+        candidates.sort(key=lambda candidate: candidate[0])
+        return {tuple(sorted([self.names[a], self.names[b]])): count for _, a, b, count in candidates}
+
+STATS_WARM_ON_STARTUP = os.getenv('STATS_WARM_ON_STARTUP', '1').lower() in ('1', 'true', 'yes')
+
+# Stats payload and its intermediate tables for the current dataset version
+stats_cache = {"version": None}
+stats_lock = threading.RLock()
+
+def get_stats_artifact(name, build):
+    """Memoize build() under name for the current dataset version"""
+    version = get_dataset_version()
+    with stats_lock:
+        if stats_cache["version"] != version:
+            stats_cache.clear()
+            stats_cache["version"] = version
+        if name not in stats_cache:
+            stats_cache[name] = build()
+        return stats_cache[name]
+
+def get_entity_table(kind, column, parse=parse_stats_json):
+    df = anime_df if kind == 'anime' else manga_df
+    # The parser is part of the key: the same column parsed two ways gives different tables
+    return get_stats_artifact(f"entities:{kind}:{column}:{parse.__name__}", lambda: EntityTable(df[column], parse))
+
+def get_stats_response():
+    """/stats/ payload for the current dataset version, computed, serialized and compressed once"""
+    return get_stats_artifact(
+        "response", lambda: PrecomputedResponse(jsonable_encoder(compute_stats()), get_dataset_version()))
+
+def warm_stats_cache():
+    """Start building the stats payload in a worker thread so the first request finds it ready"""
+    if not STATS_WARM_ON_STARTUP:
+        return None
+    return asyncio.create_task(asyncio.to_thread(get_stats_response))
+
+STATS_FILTER_CACHE_ITEMS = int(os.getenv('STATS_FILTER_CACHE_ITEMS', '64'))
+
+class StatsFilters:
+    """The /anime and /manga filter parameters, as accepted by /stats/
+
+    Each filter narrows the listings that support it: format only applies to
+    anime, author only to manga, genre to both.
+    """
+
+    SHARED = ('search', 'genre', 'year', 'status', 'min_score', 'franchise')
+    ANIME = SHARED + ('season', 'format', 'episode_type', 'completed_only')
+    MANGA = SHARED + ('type', 'demographic', 'theme', 'author', 'serialization', 'publishing',
+                      'min_chapters', 'max_chapters', 'min_volumes', 'max_volumes')
+    # Matched case-insensitively by the listings, so normalized to lower case
+    CASELESS = ('genre', 'status', 'season', 'format', 'episode_type', 'type',
+                'demographic', 'theme', 'author', 'serialization')
+
+    def __init__(
+        self,
+        search: str = None,
+        genre: str = None,
+        year: int = None,
+        status: str = None,
+        min_score: float = None,
+        franchise: int = None,
+        season: str = None,
+        format: str = None,
+        episode_type: str = None,
+        completed_only: bool = None,
+        type: str = None,
+        demographic: str = None,
+        theme: str = None,
+        author: str = None,
+        serialization: str = None,
+        publishing: bool = None,
+        min_chapters: int = None,
+        max_chapters: int = None,
+        min_volumes: int = None,
+        max_volumes: int = None,
+    ):
+        given = {
+            'search': search, 'genre': genre, 'year': year, 'status': status,
+            'min_score': min_score, 'franchise': franchise, 'season': season, 'format': format,
+            'episode_type': episode_type, 'completed_only': completed_only, 'type': type,
+            'demographic': demographic, 'theme': theme, 'author': author,
+            'serialization': serialization, 'publishing': publishing,
+            'min_chapters': min_chapters, 'max_chapters': max_chapters,
+            'min_volumes': min_volumes, 'max_volumes': max_volumes,
+        }
+        # Same "not given" rules as the listings: None, and empty strings for the `if genre:` style checks
+        self.values = {name: value.lower() if name in self.CASELESS else value
+                       for name, value in given.items() if value is not None and value != ''}
+
+    def __bool__(self):
+        return bool(self.values)
+
+    def key(self):
+        return tuple(sorted(self.values.items()))
+
+    def rows(self):
+        """(anime_rows, manga_rows) masks, None for a listing no filter applies to"""
+        masks = []
+        for df, names, apply in ((anime_df, self.ANIME, filter_anime), (manga_df, self.MANGA, filter_manga)):
+            kwargs = {name: self.values[name] for name in names if name in self.values}
+            if not kwargs:
+                masks.append(None)
+                continue
+            mask = np.zeros(len(df), dtype=bool)
+            mask[df.index.get_indexer(apply(df, **kwargs).index)] = True
+            masks.append(mask)
+        return tuple(masks)
+
+class StatsSubsetCache:
+    """LRU of stats computed over filtered subsets, keyed by dataset version and normalized filters"""
+
+    def __init__(self, max_items=64):
+        self.entries = OrderedDict()
+        self.max_items = max_items
+        self.lock = threading.Lock()
+
+    def get(self, key, build):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+        value = build()
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_items:
+                self.entries.popitem(last=False)
+        return value
+
+stats_subset_cache = StatsSubsetCache(STATS_FILTER_CACHE_ITEMS)
+
+def get_filtered_stats_response(filters, section=None):
+    """/stats/ payload, or one section of it, over the rows matching filters"""
+    version = get_dataset_version()
+    key = filters.key()
+
+    def build():
+        # The row masks are shared by every section requested with the same filters
+        scope = StatsScope(*stats_subset_cache.get(("rows", version, key), filters.rows))
+        if section is not None:
+            return PrecomputedResponse(jsonable_encoder(STATS_SECTIONS[section](scope)), version)
+        payload = {name: compute(scope) for name, compute in STATS_SECTIONS.items()}
+        return PrecomputedResponse(jsonable_encoder(payload), version)
+
+    return stats_subset_cache.get(("response", version, key, section), build)
+
+@app.get("/stats/")
+def get_stats(request: Request, filters: StatsFilters = Depends()):
+    """Get all statistics in one endpoint, optionally over the rows matching /anime and /manga filters"""
+    if filters:
+        return get_filtered_stats_response(filters).respond(request)
+    return get_stats_response().respond(request)
+
+CUBE_DIMENSIONS = ('year', 'season', 'type', 'rating', 'source', 'genre')
+
+def sort_labels(labels):
+    return sorted(labels, key=lambda label: (label is None, str(label) if isinstance(label, str) else label))
+
+class StatsCube:
+    """Anime counts, score sums and score counts over CUBE_DIMENSIONS
+
+    Only occupied cells are stored, as per-dimension code arrays. Labels are
+    sorted, with missing values as a trailing None, so ordering groups by
+    code orders them by label. A title with several genres sits in one genre
+    cell per genre, so aggregates that neither group nor filter by genre are
+    answered from a second set of cells without that dimension.
+    """
+
+    def __init__(self, anime_df, genres):
+        self.labels = {}
+        codes = {}
+        years = pd.to_numeric(anime_df['year'], errors='coerce')
+        years = np.trunc(years.where(np.isfinite(years))).astype('Int64')
+        for name, values in (('year', years), ('season', anime_df['season']), ('type', anime_df['type']),
+                             ('rating', anime_df['rating']), ('source', anime_df['source'])):
+            codes[name], self.labels[name] = self.encode(values)
+        scores = anime_df['score'].to_numpy(dtype=float)
+        self.cells = self.aggregate(codes, scores)
+
+        # One entry per (title, genre), titles without genres under the None genre
+        genre_labels = sort_labels(set(genres.names))
+        genre_code_of = np.array([genre_labels.index(name) for name in genres.names], dtype=np.int64)
+        pairs = np.unique(genres.rows * max(len(genre_labels), 1) + genre_code_of[genres.codes])
+        rows, genre_codes = np.divmod(pairs, max(len(genre_labels), 1))
+        untagged = np.setdiff1d(np.arange(len(anime_df)), rows)
+        rows = np.concatenate([rows, untagged])
+        self.labels['genre'] = genre_labels + [None]
+        codes = {name: column[rows] for name, column in codes.items()}
+        codes['genre'] = np.concatenate([genre_codes, np.full(len(untagged), len(genre_labels))])
+        self.genre_cells = self.aggregate(codes, scores[rows])
+
+        self.lookup = {name: {str(label).lower(): code for code, label in enumerate(labels) if label is not None}
+                       for name, labels in self.labels.items()}
+
+    @staticmethod
+    def encode(values):
+        """(codes, labels) of a column, missing values coded as len(labels) - 1"""
+        labels = sort_labels(pd.unique(values.dropna()).tolist())
+        codes = pd.Categorical(values, categories=labels).codes.astype(np.int64)
+        codes[codes < 0] = len(labels)
+        return codes, labels + [None]
+
+    def aggregate(self, codes, scores):
+        key = np.zeros(len(scores), dtype=np.int64)
+        for name, column in codes.items():
+            key = key * len(self.labels[name]) + column
+        cells, inverse = np.unique(key, return_inverse=True)
+        scored = np.isfinite(scores)
+        aggregates = {
+            'count': np.bincount(inverse, minlength=len(cells)),
+            'score_count': np.bincount(inverse, weights=scored, minlength=len(cells)).astype(np.int64),
+            'score_sum': np.bincount(inverse, weights=np.where(scored, scores, 0.0), minlength=len(cells)),
+        }
+        cell_codes = {}
+        for name in reversed(list(codes)):
+            cells, cell_codes[name] = np.divmod(cells, len(self.labels[name]))
+        return {'codes': cell_codes, **aggregates}
+
+    def group_by(self, dimensions, filters):
+        """Aggregates per combination of dimensions over the cells matching filters
+
+        filters maps a dimension to the labels to keep, matched case-insensitively.
+        """
+        cells = self.genre_cells if 'genre' in dimensions or 'genre' in filters else self.cells
+        selected = np.ones(len(cells['count']), dtype=bool)
+        for name, values in filters.items():
+            wanted = [self.lookup[name][value.lower()] for value in values if value.lower() in self.lookup[name]]
+            selected &= np.isin(cells['codes'][name], wanted)
+
+        key = np.zeros(int(selected.sum()), dtype=np.int64)
+        for name in dimensions:
+            key = key * len(self.labels[name]) + cells['codes'][name][selected]
+        groups, inverse = np.unique(key, return_inverse=True)
+        count = np.bincount(inverse, weights=cells['count'][selected], minlength=len(groups))
+        score_count = np.bincount(inverse, weights=cells['score_count'][selected], minlength=len(groups))
+        score_sum = np.bincount(inverse, weights=cells['score_sum'][selected], minlength=len(groups))
+
+        group_codes = {}
+        for name in reversed(dimensions):
+            groups, group_codes[name] = np.divmod(groups, len(self.labels[name]))
+        results = []
+        for i in range(len(count)):
+            result = {name: self.labels[name][group_codes[name][i]] for name in dimensions}
+            result.update({
+                'count': int(count[i]),
+                'score_count': int(score_count[i]),
+                'score_sum': float(score_sum[i]),
+                'avg_score': float(score_sum[i] / score_count[i]) if score_count[i] else None,
+            })
+            results.append(result)
+        return results
+
+def get_stats_cube():
+    return get_stats_artifact("cube", lambda: StatsCube(anime_df, get_entity_table('anime', 'genres', parse_stats_array)))
+
+# Registered before /stats/{section}, which would otherwise take "cube" for a section name
+@app.get("/stats/cube")
+def get_stats_cube_endpoint(
+    group_by: str = "",
+    year: str = None,
+    season: str = None,
+    type: str = None,
+    rating: str = None,
+    source: str = None,
+    genre: str = None,
+):
+    """Anime counts and scores grouped by any of CUBE_DIMENSIONS; each filter takes comma-separated labels"""
+    dimensions = [name.strip().lower() for name in group_by.split(',') if name.strip()]
+    unknown = [name for name in dimensions if name not in CUBE_DIMENSIONS]
+    if unknown or len(set(dimensions)) != len(dimensions):
+        raise HTTPException(status_code=400, detail=f"group_by takes distinct dimensions out of: {', '.join(CUBE_DIMENSIONS)}")
+    given = {'year': year, 'season': season, 'type': type, 'rating': rating, 'source': source, 'genre': genre}
+    filters = {name: [value.strip() for value in values.split(',') if value.strip()]
+               for name, values in given.items() if values}
+    if len(filters.get('genre', [])) > 1 and 'genre' not in dimensions:
+        raise HTTPException(status_code=400, detail="Filtering on several genres counts a title once per genre; add genre to group_by")
+
+    return {
+        "group_by": dimensions,
+        "filters": filters,
+        "groups": get_stats_cube().group_by(dimensions, filters),
+    }
+
+MAX_CORRELATION_BINS = 200
+MAX_CORRELATION_POINTS = 20000
+MAX_CORRELATION_OUTLIERS = 100
+# Finest grid the sample is spread over, so dense regions give up points first
+CORRELATION_SAMPLE_GRID = 64
+STATS_NUMERIC_COLUMNS = {
+    'anime': ('score', 'members', 'favorites', 'popularity', 'rank', 'episodes', 'year'),
+    'manga': ('score', 'members', 'favorites', 'popularity', 'rank', 'chapters', 'volumes'),
+}
+
+def grid_cells(u, v, bins):
+    """Cell of each (u, v) on a bins x bins grid spanning their range, and the grid edges"""
+    u_edges = np.linspace(u.min(), u.max(), bins + 1) if len(u) else np.zeros(bins + 1)
+    v_edges = np.linspace(v.min(), v.max(), bins + 1) if len(v) else np.zeros(bins + 1)
+    u_bin = np.clip(np.searchsorted(u_edges, u, side='right') - 1, 0, bins - 1)
+    v_bin = np.clip(np.searchsorted(v_edges, v, side='right') - 1, 0, bins - 1)
+    return u_bin * bins + v_bin, u_edges, v_edges
+
+def density_sample(cells, budget, rng):
+    """(indices, weights) of at most budget points, taking points from the fullest cells first
+
+    Every cell keeps min(count, cap) points for the largest cap that fits the
+    budget, so sparse regions are kept whole. Each kept point's weight is the
+    number of points it stands for.
+    """
+    counts = np.bincount(cells) if len(cells) else np.zeros(0, dtype=np.int64)
+    if len(cells) <= budget:
+        return np.arange(len(cells)), np.ones(len(cells))
+    low, high = 0, int(counts.max())
+    while low < high:
+        cap = (low + high + 1) // 2
+        if np.minimum(counts, cap).sum() <= budget:
+            low = cap
+        else:
+            high = cap - 1
+    kept = np.minimum(counts, low)
+    over = np.flatnonzero(counts > low)
+    kept[rng.choice(over, budget - int(kept.sum()), replace=False)] += 1
+
+    # Random order within each cell, then the first kept[cell] points of every cell
+    order = np.lexsort((rng.random(len(cells)), cells))
+    sorted_cells = cells[order]
+    rank = np.arange(len(cells)) - (np.cumsum(counts) - counts)[sorted_cells]
+    chosen = order[rank < kept[sorted_cells]]
+    chosen.sort()
+    return chosen, counts[cells[chosen]] / kept[cells[chosen]]
+
+def outlier_indices(u, v, limit):
+    """The limit points furthest from the bulk of (u, v), by Mahalanobis distance, furthest first"""
+    if limit <= 0 or len(u) < 3:
+        return np.zeros(0, dtype=np.int64)
+    centered = np.column_stack([u - u.mean(), v - v.mean()])
+    distance = np.einsum('ij,jk,ik->i', centered, np.linalg.pinv(np.cov(centered, rowvar=False)), centered)
+    top = np.argpartition(-distance, min(limit, len(u)) - 1)[:limit]
+    return top[np.argsort(-distance[top], kind='stable')]
+
+def finite_or_none(value):
+    return float(value) if np.isfinite(value) else None
+
+def compute_correlation(kind, x, y, mode, bins, points, outliers, log_x, log_y):
+    df = anime_df if kind == 'anime' else manga_df
+    x_values = pd.to_numeric(df[x], errors='coerce').to_numpy(dtype=float)
+    y_values = pd.to_numeric(df[y], errors='coerce').to_numpy(dtype=float)
+    usable = np.isfinite(x_values) & np.isfinite(y_values)
+    if log_x:
+        usable &= x_values > 0
+    if log_y:
+        usable &= y_values > 0
+    rows = np.flatnonzero(usable)
+    x_values, y_values = x_values[rows], y_values[rows]
+    # Binning, sampling and outliers all work on the axes as they are drawn
+    u = np.log10(x_values) if log_x else x_values
+    v = np.log10(y_values) if log_y else y_values
+
+    if len(rows) > 1 and np.ptp(x_values) > 0 and np.ptp(y_values) > 0:
+        pearson = finite_or_none(np.corrcoef(x_values, y_values)[0, 1])
+        spearman = finite_or_none(np.corrcoef(pd.Series(x_values).rank().to_numpy(),
+                                              pd.Series(y_values).rank().to_numpy())[0, 1])
+    else:
+        pearson = spearman = None
+
+    top = outlier_indices(u, v, outliers)
+    mal_ids = df['mal_id'].to_numpy()[rows]
+    titles = df['title'].to_numpy()[rows]
+    result = {
+        "kind": kind,
+        "x": x,
+        "y": y,
+        "log_x": log_x,
+        "log_y": log_y,
+        "mode": mode,
+        "total": int(len(rows)),
+        "dropped": int(len(df) - len(rows)),
+        "pearson": pearson,
+        "spearman": spearman,
+        "outliers": [
+            {"mal_id": int(mal_ids[i]), "title": safe_value(titles[i]),
+             x: x_values[i].item(), y: y_values[i].item()}
+            for i in top.tolist()
+        ],
+    }
+
+    if mode == 'density':
+        cells, u_edges, v_edges = grid_cells(u, v, bins)
+        counts = np.bincount(cells, minlength=bins * bins).reshape(bins, bins)
+        result["density"] = {
+            "x_edges": (10 ** u_edges if log_x else u_edges).tolist(),
+            "y_edges": (10 ** v_edges if log_y else v_edges).tolist(),
+            # counts[i][j]: points in x bin i and y bin j
+            "counts": counts.tolist(),
+        }
+    else:
+        # Outliers are always drawn; the rest of the budget goes to the density-aware sample
+        rest = np.setdiff1d(np.arange(len(rows)), top)
+        budget = max(points - len(top), 0)
+        # No more cells than the budget, so every occupied cell keeps at least one point
+        grid = max(1, min(CORRELATION_SAMPLE_GRID, math.isqrt(budget)))
+        cells, _, _ = grid_cells(u[rest], v[rest], grid)
+        chosen, weights = density_sample(cells, budget, np.random.default_rng(0))
+        picked = np.concatenate([top, rest[chosen]])
+        result["points"] = {
+            "mal_id": mal_ids[picked].tolist(),
+            "x": x_values[picked].tolist(),
+            "y": y_values[picked].tolist(),
+            "weight": np.concatenate([np.ones(len(top)), weights]).tolist(),
+        }
+    return result
+
+@app.get("/stats/correlation")
+def get_stats_correlation(
+    request: Request,
+    x: str = 'members',
+    y: str = 'score',
+    kind: str = 'anime',
+    mode: str = 'sample',
+    bins: int = 50,
+    points: int = 2000,
+    outliers: int = 20,
+    log_x: bool = False,
+    log_y: bool = False,
+):
+    """Scatter data for two numeric columns over all rows: a density grid or a density-aware sample, plus outliers"""
+    if kind not in STATS_NUMERIC_COLUMNS:
+        raise HTTPException(status_code=400, detail="kind must be 'anime' or 'manga'")
+    df = anime_df if kind == 'anime' else manga_df
+    columns = [column for column in STATS_NUMERIC_COLUMNS[kind] if column in df.columns]
+    if x not in columns or y not in columns or x == y:
+        raise HTTPException(status_code=400, detail=f"x and y must be two different columns out of: {', '.join(columns)}")
+    if mode not in ('density', 'sample'):
+        raise HTTPException(status_code=400, detail="mode must be 'density' or 'sample'")
+    if not 1 <= bins <= MAX_CORRELATION_BINS:
+        raise HTTPException(status_code=400, detail=f"bins must be between 1 and {MAX_CORRELATION_BINS}")
+    if not 1 <= points <= MAX_CORRELATION_POINTS:
+        raise HTTPException(status_code=400, detail=f"points must be between 1 and {MAX_CORRELATION_POINTS}")
+    outliers = max(0, min(outliers, MAX_CORRELATION_OUTLIERS, points))
+
+    version = get_dataset_version()
+    params = (kind, x, y, mode, bins if mode == 'density' else None, points if mode == 'sample' else None,
+              outliers, log_x, log_y)
+    response = stats_subset_cache.get(
+        ("correlation", version) + params,
+        lambda: PrecomputedResponse(jsonable_encoder(compute_correlation(
+            kind, x, y, mode, bins, points, outliers, log_x, log_y)), version))
+    return response.respond(request)
 
-@app.get("/anime/{anime_id}/image")
-async def get_anime_image(anime_id: int):
-    async with httpx.AsyncClient() as client:
-        response = await client.get(f"{JIKAN_BASE_URL}/anime/{anime_id}/pictures")
+MAX_DISTRIBUTION_BINS = 1000
 
-    if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail="Anime not found")
+def parse_number_list(text, name):
+    try:
+        return [float(value) for value in text.split(',') if value.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be comma-separated numbers")
 
-    data = response.json()
+def get_sorted_column(kind, column):
+    """(values, rows) of a numeric column's finite values in ascending order, with their row positions"""
+    def build():
+        df = anime_df if kind == 'anime' else manga_df
+        values = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+        rows = np.flatnonzero(np.isfinite(values))
+        rows = rows[np.argsort(values[rows], kind='stable')]
+        return values[rows], rows
+    return get_stats_artifact(f"sorted:{kind}:{column}", build)
 
-    if "data" not in data or not data["data"]:
-        raise HTTPException(status_code=404, detail="No images found for this anime")
+def sorted_quantiles(values, quantiles):
+    """Linearly interpolated quantiles (numpy's default method) of an already sorted array"""
+    position = np.asarray(quantiles) * (len(values) - 1)
+    below = np.floor(position).astype(np.int64)
+    above = np.minimum(below + 1, len(values) - 1)
+    return values[below] + (values[above] - values[below]) * (position - below)
 
-    first_img = data["data"][0]["jpg"]
+def compute_distribution(kind, column, rows, edges, bins, log, quantiles):
+    values, value_rows = get_sorted_column(kind, column)
+    total = len(anime_df if kind == 'anime' else manga_df)
+    if rows is not None:
+        values = values[rows[value_rows]]
+        total = int(rows.sum())
 
-    return JSONResponse(content={
-        "id": anime_id,
-        "image_url": first_img.get("image_url"),
-        "large_image_url": first_img.get("large_image_url"),
-        "small_image_url": first_img.get("small_image_url"),
-    })
+    if edges is None:
+        # Equal-width bins over the values' range, or equal-ratio bins with log
+        ranged = values[values > 0] if log else values
+        if len(ranged) == 0:
+            edges = np.zeros(0)
+        elif log:
+            edges = np.geomspace(ranged[0], ranged[-1], bins + 1)
+        else:
+            edges = np.linspace(ranged[0], ranged[-1], bins + 1)
+    edges = np.asarray(edges, dtype=float)
 
-@app.get("/manga/{manga_id}/image")
-async def get_manga_image(manga_id: int):
-    async with httpx.AsyncClient() as client:
-        response = await client.get(f"{JIKAN_BASE_URL}/manga/{manga_id}/full")
-    
-    if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail="Manga not found")
-    
-    data = response.json().get("data", {})
-    
-    image_url = data.get("images", {}).get("jpg", {}).get("large_image_url")
-    thumbnail_url = data.get("images", {}).get("jpg", {}).get("image_url")
+    # Bins are [edge, next edge) and the last one also takes its upper edge, as in np.histogram
+    if len(edges):
+        positions = np.searchsorted(values, edges, side='left')
+        positions[-1] = np.searchsorted(values, edges[-1], side='right')
+        counts = np.diff(positions)
+        below, above = int(positions[0]), int(len(values) - positions[-1])
+    else:
+        counts, below, above = np.zeros(0, dtype=np.int64), 0, 0
 
-    return JSONResponse(content={
-        "id": manga_id,
-        "image_url": image_url,
-        "thumbnail_url": thumbnail_url
-    })
+    present = len(values) > 0
+    return {
+        "kind": kind,
+        "column": column,
+        "count": int(len(values)),
+        "missing": total - int(len(values)),
+        "min": float(values[0]) if present else None,
+        "max": float(values[-1]) if present else None,
+        "mean": float(values.mean()) if present else None,
+        "edges": edges.tolist(),
+        "counts": counts.tolist(),
+        "below": below,
+        "above": above,
+        "quantiles": {
+            f"{q:g}": float(value) if present else None
+            for q, value in zip(quantiles, sorted_quantiles(values, quantiles) if present else quantiles)
+        },
+    }
 
-def build_graph():
-    nodes = {}
-    links = []
-
-    def add_node(mal_id, name, ntype, url=None):
-        key = f"{ntype}_{mal_id}"
-        if key not in nodes:
-            nodes[key] = {
-                "id": key,
-                "mal_id": int(mal_id),
-                "label": name,
-                "type": ntype,
-                "url": url
-            }
+@app.get("/stats/distribution")
+def get_stats_distribution(
+    request: Request,
+    column: str = 'score',
+    kind: str = 'anime',
+    bins: int = 10,
+    edges: str = None,
+    log: bool = False,
+    quantiles: str = '0.25,0.5,0.75',
+    filters: StatsFilters = Depends(),
+):
+    """Histogram and quantiles of a numeric column, optionally over the rows matching /anime or /manga filters
 
-    for df, ntype in [(anime_df, "anime"), (manga_df, "manga")]:
-        for _, row in df.iterrows():
-            mal_id = row["mal_id"]
-            title = row.get("title", "")
-            url = row.get("url", "")
-            add_node(mal_id, title, ntype, url)
+    edges (comma-separated, increasing) overrides bins, the number of
+    equal-width bins spanning the values; log makes those bins equal-ratio.
+    """
+    if kind not in STATS_NUMERIC_COLUMNS:
+        raise HTTPException(status_code=400, detail="kind must be 'anime' or 'manga'")
+    df = anime_df if kind == 'anime' else manga_df
+    columns = [name for name in STATS_NUMERIC_COLUMNS[kind] if name in df.columns]
+    if column not in columns:
+        raise HTTPException(status_code=400, detail=f"column must be one of: {', '.join(columns)}")
+    bin_edges = None
+    if edges:
+        bin_edges = parse_number_list(edges, 'edges')
+        if (len(bin_edges) < 2 or len(bin_edges) > MAX_DISTRIBUTION_BINS + 1
+                or not np.all(np.isfinite(bin_edges)) or np.any(np.diff(bin_edges) <= 0)):
+            raise HTTPException(status_code=400, detail=f"edges must be 2 to {MAX_DISTRIBUTION_BINS + 1} increasing finite numbers")
+    elif not 1 <= bins <= MAX_DISTRIBUTION_BINS:
+        raise HTTPException(status_code=400, detail=f"bins must be between 1 and {MAX_DISTRIBUTION_BINS}")
+    quantile_list = parse_number_list(quantiles, 'quantiles')
+    if any(not 0 <= q <= 1 for q in quantile_list):
+        raise HTTPException(status_code=400, detail="quantiles must be between 0 and 1")
 
-            if "relations" in row and pd.notna(row["relations"]):
-                try:
-                    rels = json.loads(row["relations"].replace("'", '"'))
-                    for rel in rels:
-                        relation_type = rel.get("relation", "")
-                        for entry in rel.get("entry", []):
-                            target_id = entry["mal_id"]
-                            target_type = entry.get("type", "").lower()
-                            target_name = entry.get("name", "")
-                            target_url = entry.get("url", "")
+    version = get_dataset_version()
+    key = filters.key()
 
-                            add_node(target_id, target_name, target_type, target_url)
+    def build():
+        rows = None
+        if filters:
+            anime_rows, manga_rows = stats_subset_cache.get(("rows", version, key), filters.rows)
+            rows = anime_rows if kind == 'anime' else manga_rows
+        return PrecomputedResponse(jsonable_encoder(compute_distribution(
+            kind, column, rows, bin_edges, bins, log, quantile_list)), version)
 
-                            links.append({
-                                "source": f"{ntype}_{mal_id}",
-                                "target": f"{target_type}_{target_id}",
-                                "relation": relation_type
-                            })
-                except Exception as e:
-                    continue
+    response = stats_subset_cache.get(
+        ("distribution", version, kind, column, tuple(bin_edges) if bin_edges else bins,
+         log and not bin_edges, tuple(quantile_list), key),
+        build)
+    return response.respond(request)
 
-    return {"nodes": list(nodes.values()), "links": links}
+@app.get("/stats/{section}")
+def get_stats_section_endpoint(section: str, request: Request, filters: StatsFilters = Depends()):
+    """A single /stats/ section, computed without the others"""
+    if section not in STATS_SECTIONS:
+        raise HTTPException(status_code=404, detail=f"Unknown stats section, expected one of: {', '.join(STATS_SECTIONS)}")
+    if filters:
+        return get_filtered_stats_response(filters, section).respond(request)
+    response = get_stats_artifact(
+        f"response:{section}",
+        lambda: PrecomputedResponse(jsonable_encoder(get_stats_section(section)), get_dataset_version()))
+    return response.respond(request)
 
-@app.get("/graph")
-async def get_graph():
-    graph = build_graph()
-    return JSONResponse(content=graph)
+class StatsScope:
+    """The rows of anime_df and manga_df a statistic is computed over"""
 
-@app.get("/stats/")
-def get_stats():
-    """Get all statistics in one endpoint"""
+    def __init__(self, anime_rows=None, manga_rows=None):
+        self.anime_rows = np.ones(len(anime_df), dtype=bool) if anime_rows is None else anime_rows
+        self.manga_rows = np.ones(len(manga_df), dtype=bool) if manga_rows is None else manga_rows
+        self.anime = anime_df if anime_rows is None else anime_df[anime_rows]
+        self.manga = manga_df if manga_rows is None else manga_df[manga_rows]
+        # Full-length, so entity table rows index them directly
+        self.anime_scores = anime_df['score'].to_numpy(dtype=float)
+        self.manga_scores = manga_df['score'].to_numpy(dtype=float)
 
-    # Helper functions for safe JSON parsing and array parsing
-    def safe_json_parse(field):
-        if pd.isna(field):
-            return []
-        try:
-            if isinstance(field, str):
-                return json.loads(field)
-            return field if isinstance(field, list) else []
-        except:
-            return []
-    
-    def parse_array_field(field):
-        if pd.isna(field):
-            return []
-        try:
-            if isinstance(field, str):
-                if field.startswith('['):
-                    return json.loads(field)
-                else:
-                    return [{'name': item.strip()} for item in field.split(',') if item.strip()]
-            return field if isinstance(field, list) else []
-        except:
-            return []
-    
-    # =============================================================================
-    # BASIC STATS
-    # =============================================================================
+def stats_overview(scope):
+    anime, manga = scope.anime, scope.manga
     
     # Basic counts
-    total_anime = len(anime_df)
-    total_manga = len(manga_df)
-    completed_anime = len(anime_df[anime_df['status'].str.contains('Finished', case=False, na=False)])
-    completed_manga = len(manga_df[manga_df['status'].str.contains('Finished', case=False, na=False)])
+    total_anime = len(anime)
+    total_manga = len(manga)
+    completed_anime = len(anime[anime['status'].str.contains('Finished', case=False, na=False)])
+    completed_manga = len(manga[manga['status'].str.contains('Finished', case=False, na=False)])
+    
+    # Average scores
+    anime_avg_score = float(anime['score'].mean()) if not anime['score'].isna().all() else 0
+    manga_avg_score = float(manga['score'].mean()) if not manga['score'].isna().all() else 0
     
+    return {
+        "total_anime": total_anime,
+        "total_manga": total_manga,
+        "total_items": total_anime + total_manga,
+        "completed_anime": completed_anime,
+        "completed_manga": completed_manga,
+        "anime_avg_score": anime_avg_score,
+        "manga_avg_score": manga_avg_score,
+        "completion_rates": {
+            "anime": (completed_anime / total_anime * 100) if total_anime > 0 else 0,
+            "manga": (completed_manga / total_manga * 100) if total_manga > 0 else 0
+        }
+    }
+
+def stats_scores(scope):
     # Score distributions
     bins = list(range(0, 11))
     labels = [f"{i}-{i+1}" for i in range(0, 10)]
     
-    anime_score_ranges = pd.cut(anime_df['score'], bins=bins, labels=labels, include_lowest=True, right=True).value_counts().sort_index()
+    anime_score_ranges = pd.cut(scope.anime['score'], bins=bins, labels=labels, include_lowest=True, right=True).value_counts().sort_index()
     anime_score_ranges = {str(k): int(v) for k, v in anime_score_ranges.items()}
     
-    manga_score_ranges = pd.cut(manga_df['score'], bins=bins, labels=labels, include_lowest=True, right=True).value_counts().sort_index()
+    manga_score_ranges = pd.cut(scope.manga['score'], bins=bins, labels=labels, include_lowest=True, right=True).value_counts().sort_index()
     manga_score_ranges = {str(k): int(v) for k, v in manga_score_ranges.items()}
     
-    # Average scores
-    anime_avg_score = float(anime_df['score'].mean()) if not anime_df['score'].isna().all() else 0
-    manga_avg_score = float(manga_df['score'].mean()) if not manga_df['score'].isna().all() else 0
-    
-    # =============================================================================
-    # GENRE ANALYSIS
-    # =============================================================================
+    return {
+        "anime_distribution": anime_score_ranges,
+        "manga_distribution": manga_score_ranges
+    }
+
+def stats_genres(scope):
+    anime_genres = get_entity_table('anime', 'genres', parse_stats_array)
+    manga_genres = get_entity_table('manga', 'genres')
+    anime_entries = anime_genres.mask_rows(scope.anime_rows)
     
     all_genres = {}
-    
-    # Anime genres
-    for _, row in anime_df.dropna(subset=['genres']).iterrows():
-        genres_list = parse_array_field(row['genres'])
-        for genre_item in genres_list:
-            if isinstance(genre_item, dict) and 'name' in genre_item:
-                genre_name = genre_item['name']
-                if genre_name:
-                    all_genres[genre_name] = all_genres.get(genre_name, {'anime': 0, 'manga': 0})
-                    all_genres[genre_name]['anime'] += 1
-    
-    # Manga genres
-    for _, row in manga_df.dropna(subset=['genres']).iterrows():
-        genres_list = safe_json_parse(row['genres'])
-        for genre in genres_list:
-            if isinstance(genre, dict) and genre.get('name'):
-                genre_name = genre['name']
-                all_genres[genre_name] = all_genres.get(genre_name, {'anime': 0, 'manga': 0})
-                all_genres[genre_name]['manga'] += 1
+    for kind, table, entries in [('anime', anime_genres, anime_entries),
+                                 ('manga', manga_genres, manga_genres.mask_rows(scope.manga_rows))]:
+        for genre_name, count in table.count_dict(entries).items():
+            all_genres.setdefault(genre_name, {'anime': 0, 'manga': 0})[kind] += count
     
     # Top combined genres
     top_combined_genres = {}
@@ -1001,32 +3593,16 @@ def get_stats():
     top_10_genres = dict(sorted(top_combined_genres.items(), 
                                key=lambda x: x[1]['total'], reverse=True)[:15])
     
-    # Genre combinations analysis
-    genre_pairs = {}
-    for _, row in anime_df.dropna(subset=['genres']).iterrows():
-        genres_list = parse_array_field(row['genres'])
-        genre_names = [g['name'] for g in genres_list if isinstance(g, dict) and 'name' in g]
-        
-        for i in range(len(genre_names)):
-            for j in range(i+1, len(genre_names)):
-                pair = tuple(sorted([genre_names[i], genre_names[j]]))
-                genre_pairs[pair] = genre_pairs.get(pair, 0) + 1
+    # Genre combinations analysis (sparse multi-hot product; only pairs that can make the top 10)
+    genre_pairs = anime_genres.top_pairs(10, anime_entries)
     
     top_genre_pairs = [{"pair": " + ".join(pair), "count": count} 
                       for pair, count in sorted(genre_pairs.items(), key=lambda x: x[1], reverse=True)[:10]]
     
     # Genre performance analysis
-    genre_scores = {}
-    for _, row in anime_df.dropna(subset=['genres', 'score']).iterrows():
-        genres_list = parse_array_field(row['genres'])
-        score = float(row['score'])
-        
-        for genre_item in genres_list:
-            if isinstance(genre_item, dict) and 'name' in genre_item:
-                genre_name = genre_item['name']
-                if genre_name not in genre_scores:
-                    genre_scores[genre_name] = []
-                genre_scores[genre_name].append(score)
+    scored = anime_entries & anime_genres.mask_rows(~np.isnan(scope.anime_scores))
+    genre_scores = {anime_genres.names[code]: scores
+                    for code, scores in anime_genres.score_lists(scope.anime_scores, scored).items()}
     
     genre_avg_scores = {
         genre: sum(scores) / len(scores) 
@@ -1034,25 +3610,22 @@ def get_stats():
         if len(scores) >= 10  
     }
     
-    # =============================================================================
-    # STUDIO & PRODUCER ANALYSIS
-    # =============================================================================
-    
-    studio_counts = {}
-    studio_scores = {}
-    
-    for _, row in anime_df.dropna(subset=['studios']).iterrows():
-        studios_list = safe_json_parse(row['studios'])
-        score = row.get('score', 0)
-        
-        for studio in studios_list:
-            if isinstance(studio, dict) and studio.get('name'):
-                name = studio['name']
-                studio_counts[name] = studio_counts.get(name, 0) + 1
-                if score and score > 0:
-                    if name not in studio_scores:
-                        studio_scores[name] = []
-                    studio_scores[name].append(float(score))
+    return {
+        "top_combined": top_10_genres,
+        "combinations": top_genre_pairs,
+        "performance": genre_avg_scores
+    }
+
+def stats_studios(scope):
+    studios_table = get_entity_table('anime', 'studios')
+    entries = studios_table.mask_rows(scope.anime_rows)
+    studio_counts = studios_table.count_dict(entries)
+    scored = entries & studios_table.mask_rows(scope.anime_scores > 0)
+    studio_scores = {
+        studios_table.names[code]: scores
+        for code, scores in studios_table.score_lists(scope.anime_scores, scored).items()
+        if studios_table.truthy[code]
+    }
     
     # Studio performance (min 5 anime)
     studio_performance = {}
@@ -1069,57 +3642,41 @@ def get_stats():
                               key=lambda x: x[1]['avg_score'], reverse=True)[:10])
     
     # Producer analysis
-    producer_counts = {}
-    for _, row in anime_df.dropna(subset=['producers']).iterrows():
-        producers_list = safe_json_parse(row['producers'])
-        for producer in producers_list:
-            if isinstance(producer, dict) and producer.get('name'):
-                name = producer['name']
-                producer_counts[name] = producer_counts.get(name, 0) + 1
+    producers_table = get_entity_table('anime', 'producers')
+    producer_counts = producers_table.count_dict(producers_table.mask_rows(scope.anime_rows))
     
     top_producers = dict(sorted(producer_counts.items(), key=lambda x: x[1], reverse=True)[:10])
     
-    # =============================================================================
-    # RATINGS & DEMOGRAPHICS
-    # =============================================================================
+    return {
+        "top_by_count": top_studios,
+        "best_by_score": best_studios,
+        "top_producers": top_producers
+    }
+
+def stats_classification(scope):
+    anime, manga = scope.anime, scope.manga
     
     # Rating distribution
-    rating_counts = anime_df['rating'].value_counts().to_dict()
+    rating_counts = anime['rating'].value_counts().to_dict()
     rating_scores = {}
     
     for rating in rating_counts.keys():
-        rating_data = anime_df[anime_df['rating'] == rating]['score'].dropna()
+        rating_data = anime[anime['rating'] == rating]['score'].dropna()
         if len(rating_data) > 0:
             rating_scores[rating] = float(rating_data.mean())
     
     # Demographics
-    anime_demo_counts = {}
-    manga_demo_counts = {}
-    
-    for _, row in anime_df.dropna(subset=['demographics']).iterrows():
-        demo_list = safe_json_parse(row['demographics'])
-        for demo in demo_list:
-            if isinstance(demo, dict) and demo.get('name'):
-                name = demo['name']
-                anime_demo_counts[name] = anime_demo_counts.get(name, 0) + 1
-    
-    for _, row in manga_df.dropna(subset=['demographics']).iterrows():
-        demo_list = safe_json_parse(row['demographics'])
-        for demo in demo_list:
-            if isinstance(demo, dict) and demo.get('name'):
-                name = demo['name']
-                manga_demo_counts[name] = manga_demo_counts.get(name, 0) + 1
-    
-    # =============================================================================
-    # SOURCE MATERIAL & TYPE ANALYSIS
-    # =============================================================================
+    anime_demographics = get_entity_table('anime', 'demographics')
+    manga_demographics = get_entity_table('manga', 'demographics')
+    anime_demo_counts = anime_demographics.count_dict(anime_demographics.mask_rows(scope.anime_rows))
+    manga_demo_counts = manga_demographics.count_dict(manga_demographics.mask_rows(scope.manga_rows))
     
     # Source analysis
-    source_counts = anime_df['source'].value_counts().to_dict()
+    source_counts = anime['source'].value_counts().to_dict()
     source_scores = {}
     
     for source in source_counts.keys():
-        source_data = anime_df[anime_df['source'] == source]['score'].dropna()
+        source_data = anime[anime['source'] == source]['score'].dropna()
         if len(source_data) >= 5:
             source_scores[source] = {
                 'count': source_counts[source],
@@ -1128,28 +3685,35 @@ def get_stats():
             }
     
     # Type distributions
-    anime_type_counts = anime_df['type'].value_counts().to_dict()
-    manga_type_counts = manga_df['type'].value_counts().to_dict()
+    anime_type_counts = anime['type'].value_counts().to_dict()
+    manga_type_counts = manga['type'].value_counts().to_dict()
     
-    # =============================================================================
-    # TIME & BROADCAST ANALYSIS
-    # =============================================================================
+    return {
+        "anime_types": anime_type_counts,
+        "manga_types": manga_type_counts,
+        "ratings": rating_counts,
+        "rating_scores": rating_scores,
+        "anime_demographics": anime_demo_counts,
+        "manga_demographics": manga_demo_counts,
+        "source_material": source_counts,
+        "source_performance": source_scores
+    }
+
+def stats_timing(scope):
+    anime = scope.anime
     
     # Year distribution
-    year_counts = {}
-    for year_val in anime_df['year'].dropna():
-        try:
-            year = int(float(year_val))
-            if 1900 <= year <= 2025:
-                year_counts[year] = year_counts.get(year, 0) + 1
-        except:
-            pass
+    years = pd.to_numeric(anime['year'].dropna(), errors='coerce').to_numpy(dtype=float)
+    years = np.trunc(years[np.isfinite(years)])
+    years = years[(years >= 1900) & (years <= 2025)].astype(np.int64)
+    year_values, year_totals = np.unique(years, return_counts=True)
+    year_counts = dict(zip(year_values.tolist(), year_totals.tolist()))
     
     # Season analysis
-    season_counts = anime_df['season'].value_counts().to_dict()
+    season_counts = anime['season'].value_counts().to_dict()
     season_scores = {}
     for season in ['spring', 'summer', 'fall', 'winter']:
-        season_data = anime_df[anime_df['season'] == season]['score'].dropna()
+        season_data = anime[anime['season'] == season]['score'].dropna()
         if len(season_data) > 0:
             season_scores[season] = {
                 'count': len(season_data),
@@ -1157,7 +3721,7 @@ def get_stats():
             }
     
     # Broadcast timing
-    broadcast_day_counts = anime_df['broadcast_day'].value_counts().to_dict()
+    broadcast_day_counts = anime['broadcast_day'].value_counts().to_dict()
     
     time_slots = {
         'Morning (06-12)': 0,
@@ -1166,86 +3730,119 @@ def get_stats():
         'Late Night (22-06)': 0
     }
     
-    for time_str in anime_df['broadcast_time'].dropna():
+    # Each distinct broadcast time is parsed once, then counted per slot
+    time_codes, distinct_times = pd.factorize(anime['broadcast_time'])
+    slot_names = list(time_slots)
+    slot_of_time = []
+    for time_str in distinct_times:
         try:
             hour = int(time_str.split(':')[0])
             if 6 <= hour < 12:
-                time_slots['Morning (06-12)'] += 1
+                slot_of_time.append(0)
             elif 12 <= hour < 18:
-                time_slots['Afternoon (12-18)'] += 1
+                slot_of_time.append(1)
             elif 18 <= hour < 22:
-                time_slots['Evening (18-22)'] += 1
+                slot_of_time.append(2)
             else:
-                time_slots['Late Night (22-06)'] += 1
+                slot_of_time.append(3)
         except:
-            pass
+            slot_of_time.append(-1)
+    slots = np.array(slot_of_time, dtype=np.int64)[time_codes[time_codes >= 0]]
+    for slot, count in enumerate(np.bincount(slots[slots >= 0], minlength=len(slot_names)).tolist()):
+        time_slots[slot_names[slot]] += count
     
-    # =============================================================================
-    # POPULARITY & RANKING ANALYSIS
-    # =============================================================================
+    return {
+        "year_distribution": dict(sorted(year_counts.items())),
+        "season_distribution": season_counts,
+        "season_performance": season_scores,
+        "broadcast_days": broadcast_day_counts,
+        "broadcast_time_slots": time_slots
+    }
+
+def stats_popularity(scope):
+    anime, manga = scope.anime, scope.manga
     
     # Correlation data (limit to prevent huge responses)
-    popularity_score_data = []
-    rank_score_data = []
-    members_score_data = []
-    
     # Sample data for correlations (every 10th entry to reduce size)
-    sample_anime = anime_df[::10] 
-    
-    for _, row in sample_anime.dropna(subset=['popularity', 'score']).iterrows():
-        popularity_score_data.append({
-            'popularity': int(row['popularity']),
-            'score': float(row['score']),
-            'title': row['title'][:50] 
-        })
-    
-    for _, row in sample_anime.dropna(subset=['rank', 'score']).iterrows():
-        rank_score_data.append({
-            'rank': int(row['rank']),
-            'score': float(row['score']),
-            'title': row['title'][:50]
-        })
+    sample_anime = anime[::10] 
     
-    for _, row in sample_anime.dropna(subset=['members', 'score']).iterrows():
-        members_score_data.append({
-            'members': int(row['members']),
-            'score': float(row['score']),
-            'title': row['title'][:50]
-        })
+    def correlation_points(column):
+        sample = sample_anime.dropna(subset=[column, 'score'])
+        return [
+            {column: int(value), 'score': float(score), 'title': title[:50]}
+            for value, score, title in zip(sample[column], sample['score'], sample['title'])
+        ]
     
     # Members distribution
     members_ranges = {
-        '0-10K': len(anime_df[anime_df['members'] <= 10000]),
-        '10K-50K': len(anime_df[(anime_df['members'] > 10000) & (anime_df['members'] <= 50000)]),
-        '50K-100K': len(anime_df[(anime_df['members'] > 50000) & (anime_df['members'] <= 100000)]),
-        '100K-500K': len(anime_df[(anime_df['members'] > 100000) & (anime_df['members'] <= 500000)]),
-        '500K+': len(anime_df[anime_df['members'] > 500000])
+        '0-10K': len(anime[anime['members'] <= 10000]),
+        '10K-50K': len(anime[(anime['members'] > 10000) & (anime['members'] <= 50000)]),
+        '50K-100K': len(anime[(anime['members'] > 50000) & (anime['members'] <= 100000)]),
+        '100K-500K': len(anime[(anime['members'] > 100000) & (anime['members'] <= 500000)]),
+        '500K+': len(anime[anime['members'] > 500000])
     }
     
-    # Top lists (limit to 20 items each)
-    top_favorites = anime_df.nlargest(20, 'favorites')[['title', 'favorites', 'score']].to_dict('records')
-    top_members = anime_df.nlargest(20, 'members')[['title', 'members', 'score']].to_dict('records')
-    top_scored = anime_df.nlargest(20, 'score')[['title', 'score', 'members', 'favorites']].to_dict('records')
+    return {
+        "members_ranges": members_ranges,
+        # Top lists (limit to 20 items each)
+        "top_favorites": anime.nlargest(20, 'favorites')[['title', 'favorites', 'score']].to_dict('records'),
+        "top_members": anime.nlargest(20, 'members')[['title', 'members', 'score']].to_dict('records'),
+        "top_scored": anime.nlargest(20, 'score')[['title', 'score', 'members', 'favorites']].to_dict('records'),
+        "top_manga_scored": manga.nlargest(20, 'score')[['title', 'score', 'members', 'favorites']].to_dict('records'),
+        "top_manga_favorites": manga.nlargest(20, 'favorites')[['title', 'favorites', 'score']].to_dict('records'), 
+        "top_manga_members": manga.nlargest(20, 'members')[['title', 'members', 'score']].to_dict('records'),
+        "correlations": {
+            "popularity_score": correlation_points('popularity'),
+            "rank_score": correlation_points('rank'),
+            "members_score": correlation_points('members')
+        }
+    }
+
+def stats_content_length(scope):
+    anime, manga = scope.anime, scope.manga
     
-    # =============================================================================
-    # AUTHOR & SERIALIZATION ANALYSIS (MANGA)
-    # =============================================================================
+    # Episode ranges
+    episode_ranges = {
+        '1 Episode': len(anime[anime['episodes'] == 1]),
+        '2-12 Episodes': len(anime[(anime['episodes'] >= 2) & (anime['episodes'] <= 12)]),
+        '13-26 Episodes': len(anime[(anime['episodes'] >= 13) & (anime['episodes'] <= 26)]),
+        '27-52 Episodes': len(anime[(anime['episodes'] >= 27) & (anime['episodes'] <= 52)]),
+        '53+ Episodes': len(anime[anime['episodes'] > 52])
+    }
     
-    author_counts = {}
-    author_scores = {}
+    # Chapter ranges
+    chapter_ranges = {
+        '1-50': len(manga[(manga['chapters'] >= 1) & (manga['chapters'] <= 50)]),
+        '51-100': len(manga[(manga['chapters'] >= 51) & (manga['chapters'] <= 100)]),
+        '101-200': len(manga[(manga['chapters'] >= 101) & (manga['chapters'] <= 200)]),
+        '201-500': len(manga[(manga['chapters'] >= 201) & (manga['chapters'] <= 500)]),
+        '500+': len(manga[manga['chapters'] > 500])
+    }
     
-    for _, row in manga_df.dropna(subset=['authors']).iterrows():
-        authors_list = safe_json_parse(row['authors'])
-        score = row.get('score', 0)
-        
-        for author in authors_list:
-            if isinstance(author, dict) and author.get('name'):
-                name = author['name']
-                author_counts[name] = author_counts.get(name, 0) + 1
-                if score and score > 0:
-                    if name not in author_scores:
-                        author_scores[name] = []
-                    author_scores[name].append(float(score))
+    # Volume ranges
+    volume_ranges = {
+        '1-10': len(manga[(manga['volumes'] >= 1) & (manga['volumes'] <= 10)]),
+        '11-25': len(manga[(manga['volumes'] >= 11) & (manga['volumes'] <= 25)]),
+        '26-50': len(manga[(manga['volumes'] >= 26) & (manga['volumes'] <= 50)]),
+        '51+': len(manga[manga['volumes'] > 50])
+    }
+    
+    return {
+        "episode_distribution": episode_ranges,
+        "chapter_distribution": chapter_ranges,
+        "volume_distribution": volume_ranges
+    }
+
+def stats_creators(scope):
+    authors_table = get_entity_table('manga', 'authors')
+    entries = authors_table.mask_rows(scope.manga_rows)
+    author_counts = authors_table.count_dict(entries)
+    scored = entries & authors_table.mask_rows(scope.manga_scores > 0)
+    author_scores = {
+        authors_table.names[code]: scores
+        for code, scores in authors_table.score_lists(scope.manga_scores, scored).items()
+        if authors_table.truthy[code]
+    }
     
     top_authors = dict(sorted(author_counts.items(), key=lambda x: x[1], reverse=True)[:15])
     
@@ -1262,145 +3859,42 @@ def get_stats():
                                     key=lambda x: x[1]['avg_score'], reverse=True)[:10])
     
     # Serializations
-    serialization_counts = {}
-    for _, row in manga_df.dropna(subset=['serializations']).iterrows():
-        serial_list = safe_json_parse(row['serializations'])
-        for serial in serial_list:
-            if isinstance(serial, dict) and serial.get('name'):
-                name = serial['name']
-                serialization_counts[name] = serialization_counts.get(name, 0) + 1
+    serializations_table = get_entity_table('manga', 'serializations')
+    serialization_counts = serializations_table.count_dict(serializations_table.mask_rows(scope.manga_rows))
     
     top_serializations = dict(sorted(serialization_counts.items(), key=lambda x: x[1], reverse=True)[:10])
     
-    # =============================================================================
-    # EPISODE & CHAPTER DISTRIBUTIONS
-    # =============================================================================
-    
-    # Episode ranges
-    episode_ranges = {
-        '1 Episode': len(anime_df[anime_df['episodes'] == 1]),
-        '2-12 Episodes': len(anime_df[(anime_df['episodes'] >= 2) & (anime_df['episodes'] <= 12)]),
-        '13-26 Episodes': len(anime_df[(anime_df['episodes'] >= 13) & (anime_df['episodes'] <= 26)]),
-        '27-52 Episodes': len(anime_df[(anime_df['episodes'] >= 27) & (anime_df['episodes'] <= 52)]),
-        '53+ Episodes': len(anime_df[anime_df['episodes'] > 52])
-    }
-    
-    # Chapter ranges
-    chapter_ranges = {
-        '1-50': len(manga_df[(manga_df['chapters'] >= 1) & (manga_df['chapters'] <= 50)]),
-        '51-100': len(manga_df[(manga_df['chapters'] >= 51) & (manga_df['chapters'] <= 100)]),
-        '101-200': len(manga_df[(manga_df['chapters'] >= 101) & (manga_df['chapters'] <= 200)]),
-        '201-500': len(manga_df[(manga_df['chapters'] >= 201) & (manga_df['chapters'] <= 500)]),
-        '500+': len(manga_df[manga_df['chapters'] > 500])
-    }
-    
-    # Volume ranges
-    volume_ranges = {
-        '1-10': len(manga_df[(manga_df['volumes'] >= 1) & (manga_df['volumes'] <= 10)]),
-        '11-25': len(manga_df[(manga_df['volumes'] >= 11) & (manga_df['volumes'] <= 25)]),
-        '26-50': len(manga_df[(manga_df['volumes'] >= 26) & (manga_df['volumes'] <= 50)]),
-        '51+': len(manga_df[manga_df['volumes'] > 50])
-    }
-    
-    # =============================================================================
-    # RETURN DATA
-    # =============================================================================
-    
-    top_manga_scored = manga_df.nlargest(20, 'score')[['title', 'score', 'members', 'favorites']].to_dict('records')
-    top_manga_favorites = manga_df.nlargest(20, 'favorites')[['title', 'favorites', 'score']].to_dict('records')
-    top_manga_members = manga_df.nlargest(20, 'members')[['title', 'members', 'score']].to_dict('records')
-
     return {
-        "overview": {
-            "total_anime": total_anime,
-            "total_manga": total_manga,
-            "total_items": total_anime + total_manga,
-            "completed_anime": completed_anime,
-            "completed_manga": completed_manga,
-            "anime_avg_score": anime_avg_score,
-            "manga_avg_score": manga_avg_score,
-            "completion_rates": {
-                "anime": (completed_anime / total_anime * 100) if total_anime > 0 else 0,
-                "manga": (completed_manga / total_manga * 100) if total_manga > 0 else 0
-            }
-        },
-        
-        # Score Analysis
-        "scores": {
-            "anime_distribution": anime_score_ranges,
-            "manga_distribution": manga_score_ranges
-        },
-        
-        # Genre Analysis
-        "genres": {
-            "top_combined": top_10_genres,
-            "combinations": top_genre_pairs,
-            "performance": genre_avg_scores
-        },
-        
-        # Studio & Production
-        "studios": {
-            "top_by_count": top_studios,
-            "best_by_score": best_studios,
-            "top_producers": top_producers
-        },
-        
-        # Content Classification
-        "classification": {
-            "anime_types": anime_type_counts,
-            "manga_types": manga_type_counts,
-            "ratings": rating_counts,
-            "rating_scores": rating_scores,
-            "anime_demographics": anime_demo_counts,
-            "manga_demographics": manga_demo_counts,
-            "source_material": source_counts,
-            "source_performance": source_scores
-        },
-        
-        # Time & Broadcasting
-        "timing": {
-            "year_distribution": dict(sorted(year_counts.items())),
-            "season_distribution": season_counts,
-            "season_performance": season_scores,
-            "broadcast_days": broadcast_day_counts,
-            "broadcast_time_slots": time_slots
-        },
-        
-        # Popularity & Community
-        "popularity": {
-            "members_ranges": members_ranges,
-            "top_favorites": top_favorites,
-            "top_members": top_members,
-            "top_scored": top_scored,
-            "top_manga_scored": top_manga_scored,
-            "top_manga_favorites": top_manga_favorites, 
-            "top_manga_members": top_manga_members,
-            "correlations": {
-                "popularity_score": popularity_score_data,
-                "rank_score": rank_score_data,
-                "members_score": members_score_data
-            }
-        },
-        
-        # Content Length
-        "content_length": {
-            "episode_distribution": episode_ranges,
-            "chapter_distribution": chapter_ranges,
-            "volume_distribution": volume_ranges
-        },
-        
-        # Creators (Manga)
-        "creators": {
-            "top_authors": top_authors,
-            "best_authors": best_authors_sorted,
-            "top_serializations": top_serializations
-        }
+        "top_authors": top_authors,
+        "best_authors": best_authors_sorted,
+        "top_serializations": top_serializations
     }
 
+# Sections of /stats/, in response order
+STATS_SECTIONS = {
+    "overview": stats_overview,
+    "scores": stats_scores,
+    "genres": stats_genres,
+    "studios": stats_studios,
+    "classification": stats_classification,
+    "timing": stats_timing,
+    "popularity": stats_popularity,
+    "content_length": stats_content_length,
+    "creators": stats_creators,
+}
+
+def get_stats_section(section):
+    """One /stats/ section over the full dataset, computed on first use per dataset version"""
+    return get_stats_artifact(f"section:{section}", lambda: STATS_SECTIONS[section](StatsScope()))
+
+def compute_stats():
+    """Every statistic served by /stats/, assembled from the section caches"""
+    return {section: get_stats_section(section) for section in STATS_SECTIONS}
+
 import pickle
 import gzip
 import os
-from typing import Optional
+from typing import Optional, List
 
 recommender = None
 class SearchRequest(BaseModel):
@@ -1496,6 +3990,321 @@ def search_anime(request: SearchRequest):
         print(f"Search error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
+# =============================================================================
+# UNIFIED TITLE INDEX (ANIME + MANGA)
+# =============================================================================
+
+class TitleIndex:
+    """Lowercased title keys for anime_df and manga_df, each entry tagged with its media type"""
+
+    # Match tiers, best first
+    MATCH_EXACT = 0
+    MATCH_PREFIX = 1
+    MATCH_WORD = 2
+    MATCH_SUBSTRING = 3
+    MATCH_NAMES = ['exact', 'prefix', 'word', 'substring']
+    TIER_WEIGHTS = [1.0, 0.9, 0.8, 0.6]
+
+    KEY_COLUMNS = ['title', 'title_english', 'title_japanese']
+
+    def __init__(self, anime_df, manga_df):
+        self.entries = pd.concat([
+            self._build_entries(anime_df, 'anime'),
+            self._build_entries(manga_df, 'manga'),
+        ], ignore_index=True)
+
+        self.media_types = self.entries['media_type'].to_numpy()
+        self.members = self.entries['members'].fillna(0).to_numpy()
+        self.keys = {column: self.entries[column].str.lower() for column in self.KEY_COLUMNS}
+        self.exact_lookup = self._build_exact_lookup()
+        self.title_keys, self.title_entries = self._build_sorted_keys(words=False)
+        self.word_keys, self.word_entries = self._build_sorted_keys(words=True)
+
+    def _build_exact_lookup(self):
+        """Map (media_type, lowercased title) to the most popular entry with that exact title"""
+        keys = pd.concat([
+            pd.DataFrame({'key': keys, 'index': np.arange(len(keys))})
+            for keys in self.keys.values()
+        ], ignore_index=True)
+        keys = keys[keys['key'] != '']
+        keys['media_type'] = self.media_types[keys['index'].to_numpy()]
+        keys['members'] = self.members[keys['index'].to_numpy()]
+        keys = keys.sort_values('members', ascending=False, kind='stable')
+
+        lookup = {}
+        for media_type in [None, 'anime', 'manga']:
+            subset = keys if media_type is None else keys[keys['media_type'] == media_type]
+            subset = subset.drop_duplicates('key')
+            lookup.update(zip(zip([media_type] * len(subset), subset['key']), subset['index']))
+        return lookup
+
+    def _build_sorted_keys(self, words):
+        """Sorted lowercased keys and their entry indices, so a prefix is a searchsorted range
+
+        With words, the keys are the suffixes of every title that start after a
+        space, so a prefix range finds the word matches.
+        """
+        keys, entries = [], []
+        for column_keys in self.keys.values():
+            for index, key in enumerate(column_keys.tolist()):
+                if not key:
+                    continue
+                if not words:
+                    keys.append(key)
+                    entries.append(index)
+                    continue
+                for position in [i + 1 for i, char in enumerate(key) if char == ' ']:
+                    keys.append(key[position:])
+                    entries.append(index)
+        keys = np.array(keys, dtype=object)
+        order = np.argsort(keys, kind='stable')
+        return keys[order], np.array(entries, dtype=np.int64)[order]
+
+    @staticmethod
+    def _build_entries(df, media_type):
+        """Flatten one dataframe into the columns the index searches and returns"""
+        def text_column(column):
+            if column not in df.columns:
+                return np.full(len(df), '', dtype=object)
+            return df[column].fillna('').astype(str).to_numpy()
+
+        def numeric_column(column):
+            if column not in df.columns:
+                return np.full(len(df), np.nan)
+            return pd.to_numeric(df[column], errors='coerce').to_numpy()
+
+        if media_type == 'anime':
+            years = numeric_column('year')
+        else:
+            years = pd.to_datetime(df['published_from'], errors='coerce', utc=True).dt.year.to_numpy()
+
+        images = [extract_image_urls(value) for value in df['images']] if 'images' in df.columns else []
+        image_urls = [image_url for image_url, _ in images] or [None] * len(df)
+
+        return pd.DataFrame({
+            'media_type': media_type,
+            'mal_id': pd.to_numeric(df['mal_id'], errors='coerce').fillna(0).astype(int).to_numpy(),
+            'title': text_column('title'),
+            'title_english': text_column('title_english'),
+            'title_japanese': text_column('title_japanese'),
+            'type': text_column('type'),
+            'score': numeric_column('score'),
+            'members': numeric_column('members'),
+            'year': years,
+            'episodes': numeric_column('episodes'),
+            'chapters': numeric_column('chapters'),
+            'image_url': image_urls,
+        })
+
+    def match(self, query):
+        """Return (entry indices, match tiers) for every entry containing the query"""
+        mask = np.zeros(len(self.entries), dtype=bool)
+        for keys in self.keys.values():
+            mask |= keys.str.contains(query, regex=False).to_numpy()
+
+        indices = np.flatnonzero(mask)
+        tiers = np.full(len(indices), self.MATCH_SUBSTRING)
+        for keys in self.keys.values():
+            candidates = keys.iloc[indices]
+            column_tiers = np.select(
+                [
+                    (candidates == query).to_numpy(),
+                    candidates.str.startswith(query).to_numpy(),
+                    candidates.str.contains(' ' + query, regex=False).to_numpy(),
+                ],
+                [self.MATCH_EXACT, self.MATCH_PREFIX, self.MATCH_WORD],
+                default=self.MATCH_SUBSTRING,
+            )
+            tiers = np.minimum(tiers, column_tiers)
+        return indices, tiers
+
+    def prefix_match(self, query):
+        """Return (entry indices, match tiers) for exact, prefix and word matches only
+
+        Answered from the sorted key arrays in O(log n) plus the matches; entries
+        that only contain the query mid-word are not included.
+        """
+        found_indices, found_tiers = [], []
+        for keys, entries, tier in [(self.title_keys, self.title_entries, self.MATCH_PREFIX),
+                                    (self.word_keys, self.word_entries, self.MATCH_WORD)]:
+            start, end = np.searchsorted(keys, [query, query + '\U0010ffff'])
+            found_indices.append(entries[start:end])
+            found_tiers.append(np.where(keys[start:end] == query, self.MATCH_EXACT, tier)
+                               if tier == self.MATCH_PREFIX else np.full(end - start, tier))
+        indices = np.concatenate(found_indices)
+        tiers = np.concatenate(found_tiers).astype(np.int64)
+        # Best tier per entry, entries in index order as match() returns them
+        order = np.lexsort((tiers, indices))
+        indices, tiers = indices[order], tiers[order]
+        first = np.ones(len(indices), dtype=bool)
+        first[1:] = indices[1:] != indices[:-1]
+        return indices[first], tiers[first]
+
+    def rank(self, indices, tiers):
+        """Order matches by tier, then by members (most popular first)"""
+        order = np.lexsort((-self.members[indices], tiers))
+        return indices[order], tiers[order]
+
+    def search(self, query, limit=10, anime_limit=None, manga_limit=None):
+        """Merged, ranked search over both media types with optional per-type limits"""
+        query = query.lower().strip()
+        indices, tiers = self.rank(*self.match(query))
+
+        types = self.media_types[indices]
+        keep = np.ones(len(indices), dtype=bool)
+        for media_type, type_limit in [('anime', anime_limit), ('manga', manga_limit)]:
+            if type_limit is not None:
+                is_type = types == media_type
+                keep &= ~is_type | (np.cumsum(is_type) <= type_limit)
+
+        selected = np.flatnonzero(keep)[:limit]
+        return {
+            "data": [self.format_entry(indices[i], tiers[i]) for i in selected],
+            "total": int(len(indices)),
+            "totals": {
+                "anime": int((types == 'anime').sum()),
+                "manga": int((types == 'manga').sum()),
+            },
+        }
+
+    def confidence(self, query, index, tier):
+        """Match quality in [0, 1]: tier weight scaled by how much of the title the query covers"""
+        if tier == self.MATCH_EXACT:
+            return 1.0
+        coverage = max(
+            (len(query) / len(keys.iat[index]) for keys in self.keys.values() if query in keys.iat[index]),
+            default=0.0,
+        )
+        return round(self.TIER_WEIGHTS[tier] * (0.5 + 0.5 * coverage), 3)
+
+    def resolve(self, queries, media_type=None, limit=1):
+        """Best matches with confidence for many queries in one call
+
+        Exact titles are answered from the hash lookup, then exact, prefix and
+        word matches from the sorted key arrays. Only a query with fewer of
+        those than limit falls back to the substring column scan, since
+        substring matches rank after all of them.
+        """
+        resolved = {}
+        for query in {q.lower().strip() for q in queries}:
+            if len(query) < 2:
+                resolved[query] = []
+                continue
+
+            exact_index = self.exact_lookup.get((media_type, query))
+            if exact_index is not None and limit == 1:
+                resolved[query] = [(int(exact_index), self.MATCH_EXACT)]
+                continue
+
+            for find in (self.prefix_match, self.match):
+                indices, tiers = find(query)
+                if media_type is not None:
+                    is_type = self.media_types[indices] == media_type
+                    indices, tiers = indices[is_type], tiers[is_type]
+                if len(indices) >= limit:
+                    break
+            indices, tiers = self.rank(indices, tiers)
+            resolved[query] = list(zip(indices[:limit].tolist(), tiers[:limit].tolist()))
+
+        results = []
+        for original in queries:
+            query = original.lower().strip()
+            matches = []
+            for index, tier in resolved[query]:
+                entry = self.format_entry(index, tier)
+                entry['confidence'] = self.confidence(query, index, tier)
+                matches.append(entry)
+            results.append({"query": original, "matches": matches})
+        return results
+
+    def format_entry(self, index, tier):
+        entry = self.entries.iloc[index]
+        result = {
+            'media_type': entry['media_type'],
+            'mal_id': int(entry['mal_id']),
+            'title': entry['title'],
+            'title_english': entry['title_english'],
+            'score': safe_value(entry['score']),
+            'year': int(entry['year']) if pd.notna(entry['year']) else None,
+            'type': entry['type'],
+            'image_url': entry['image_url'],
+            'match': self.MATCH_NAMES[tier],
+        }
+        if entry['media_type'] == 'anime':
+            result['episodes'] = int(entry['episodes']) if pd.notna(entry['episodes']) else None
+        else:
+            result['chapters'] = int(entry['chapters']) if pd.notna(entry['chapters']) else None
+        return result
+
+title_index = None
+
+def get_title_index():
+    global title_index
+    if title_index is None:
+        title_index = TitleIndex(anime_df, manga_df)
+    return title_index
+
+class UnifiedSearchRequest(BaseModel):
+    q: str
+    limit: int = 10
+    anime_limit: Optional[int] = None
+    manga_limit: Optional[int] = None
+
+@app.post("/search")
+def search_all(request: UnifiedSearchRequest):
+    """Search anime and manga titles in one pass, merged and ranked"""
+    if anime_df is None or manga_df is None or (anime_df.empty and manga_df.empty):
+        raise HTTPException(status_code=503, detail="Database not loaded")
+
+    if len(request.q.strip()) < 2:
+        return {"data": [], "total": 0, "totals": {"anime": 0, "manga": 0}}
+
+    try:
+        result = get_title_index().search(
+            request.q,
+            limit=request.limit,
+            anime_limit=request.anime_limit,
+            manga_limit=request.manga_limit,
+        )
+    except Exception as e:
+        print(f"Search error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+
+    result.update({"query": request.q, "limit": request.limit})
+    return result
+
+MAX_BATCH_QUERIES = 1000
+
+class BatchSearchRequest(BaseModel):
+    queries: List[str]
+    media_type: Optional[str] = None
+    limit: int = 1
+
+@app.post("/search/batch")
+def search_batch(request: BatchSearchRequest):
+    """Resolve many titles to MAL ids in one call, with a confidence score per match"""
+    if anime_df is None or manga_df is None or (anime_df.empty and manga_df.empty):
+        raise HTTPException(status_code=503, detail="Database not loaded")
+
+    if len(request.queries) > MAX_BATCH_QUERIES:
+        raise HTTPException(status_code=400, detail=f"Too many queries (max {MAX_BATCH_QUERIES})")
+
+    media_type = request.media_type.lower() if request.media_type else None
+    if media_type not in (None, 'anime', 'manga'):
+        raise HTTPException(status_code=400, detail="media_type must be 'anime' or 'manga'")
+
+    try:
+        results = get_title_index().resolve(request.queries, media_type=media_type, limit=max(1, request.limit))
+    except Exception as e:
+        print(f"Batch search error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Batch search failed: {str(e)}")
+
+    return {
+        "results": results,
+        "count": len(results),
+        "resolved": sum(1 for result in results if result["matches"]),
+    }
+
 
 import pandas as pd
 import numpy as np
@@ -1838,29 +4647,7 @@ class AnimeRecommender:
         
         return "; ".join(explanation_parts) if explanation_parts else "Similar content profile and viewing appeal"
     
-    def get_image_urls(self, mal_id, anime_df):
-        """Extract image URLs from anime dataframe"""
-        anime_row = anime_df[anime_df['mal_id'] == mal_id]
-        if anime_row.empty:
-            return None, None
-        
-        images_data = anime_row.iloc[0].get('images')
-        if pd.notna(images_data):
-            try:
-                images_dict = json.loads(images_data) if isinstance(images_data, str) else images_data
-                
-                if isinstance(images_dict, dict):
-                    for format_type in ['webp', 'jpg']:
-                        if format_type in images_dict and isinstance(images_dict[format_type], dict):
-                            image_url = (images_dict[format_type].get('large_image_url') or 
-                                       images_dict[format_type].get('image_url'))
-                            thumbnail_url = images_dict[format_type].get('small_image_url')
-                            return image_url, thumbnail_url
-            except:
-                pass
-        return None, None
-    
-    def recommend(self, anime_id, top_k=10, min_score=None, include_sequels=True, explain=False):
+    def recommend(self, anime_id, top_k=10, min_score=None, include_sequels=True, explain=False, one_per_franchise=False):
         """Single anime recommendation"""
         if anime_id not in self.df['mal_id'].values:
             return {"error": "Anime not found"}
@@ -1889,11 +4676,21 @@ class AnimeRecommender:
                     filtered_indices.append(idx)
             results_df = results_df.loc[filtered_indices]
     
+        if one_per_franchise:
+            # Keep the most similar title of each franchise, none from the source's own
+            franchises = get_franchise_index()
+            results_df['franchise'] = franchises.ids_for('anime', results_df['mal_id'])
+            results_df = results_df[results_df['franchise'] != franchises.lookup('anime', anime_id)]
+            results_df = results_df.sort_values('similarity', ascending=False, kind='stable').drop_duplicates('franchise')
+    
+        filters_applied = {'min_score': min_score, 'include_sequels': include_sequels, 'explain': explain,
+                           'one_per_franchise': one_per_franchise}
+    
         if len(results_df) == 0:
             return {
                 'source': self._format_source_anime(source_anime),
                 'recommendations': [],
-                'filters_applied': {'min_score': min_score, 'include_sequels': include_sequels, 'explain': explain}
+                'filters_applied': filters_applied
             }
         
         sim_indices = results_df.nlargest(min(top_k, len(results_df)), 'similarity').index
@@ -1927,7 +4724,7 @@ class AnimeRecommender:
         return {
             'source': self._format_source_anime(source_anime),
             'recommendations': recommendations,
-            'filters_applied': {'min_score': min_score, 'include_sequels': include_sequels, 'explain': explain}
+            'filters_applied': filters_applied
         }
         
     def is_sequel_or_related(self, candidate_row, source_anime_list):
@@ -1970,7 +4767,8 @@ class AnimeRecommender:
         
         return False
     
-    def multi_recommend(self, anime_ids, top_k=20, min_score=None, include_sequels=True, explain=False, diversity_weight=0.0):
+    def multi_recommend(self, anime_ids, top_k=20, min_score=None, include_sequels=True, explain=False, diversity_weight=0.0,
+                        one_per_franchise=False):
         """Multi-anime recommendation"""
         if not anime_ids or len(anime_ids) > 20:
             return {"error": "Invalid anime IDs (must be 1-20)"}
@@ -2080,6 +4878,18 @@ class AnimeRecommender:
         # Sort and balance results
         final_candidates.sort(key=lambda x: x['final_score'], reverse=True)
         
+        if one_per_franchise:
+            # Keep the best-scored title of each franchise, none from the sources' own
+            franchises = get_franchise_index()
+            seen = set(franchises.ids_for('anime', selected_mal_ids).tolist())
+            candidate_franchises = franchises.ids_for('anime', [c['mal_id'] for c in final_candidates]).tolist()
+            deduped = []
+            for candidate, franchise_id in zip(final_candidates, candidate_franchises):
+                if franchise_id not in seen:
+                    seen.add(franchise_id)
+                    deduped.append(candidate)
+            final_candidates = deduped
+        
         # Apply bridge content balancing for multiple sources
         if len(valid_anime) >= 2:
             bridge_candidates = [c for c in final_candidates if c['genre_bonus'] > 0.2]
@@ -2164,7 +4974,8 @@ class AnimeRecommender:
                 'min_score': min_score,
                 'include_sequels': include_sequels,
                 'explain': explain,
-                'diversity_weight': diversity_weight
+                'diversity_weight': diversity_weight,
+                'one_per_franchise': one_per_franchise
             }
         }
     
@@ -2208,27 +5019,25 @@ def load_recommender():
 
 @app.get("/anime/{anime_id}/recommend")
 def get_anime_recommendations(anime_id: int, limit: int = 10, min_score: float = None, 
-                            include_sequels: bool = True, explain: bool = False):
+                            include_sequels: bool = True, explain: bool = False, one_per_franchise: bool = False):
     """Get anime recommendations based on trained model"""
     rec = load_recommender()
     if rec is None:
         raise HTTPException(status_code=503, detail="Recommendation model not available")
     
     result = rec.recommend(anime_id, top_k=limit, min_score=min_score, 
-                          include_sequels=include_sequels, explain=explain)
+                          include_sequels=include_sequels, explain=explain,
+                          one_per_franchise=one_per_franchise)
     
     if "error" in result:
         status = 404 if "not found" in result["error"].lower() else 500
         raise HTTPException(status_code=status, detail=result["error"])
     
-    # Add image URLs to recommendations
-    for rec_item in result['recommendations']:
-        image_url, thumbnail_url = rec.get_image_urls(rec_item['mal_id'], anime_df)
-        rec_item.update({'image_url': image_url, 'thumbnail_url': thumbnail_url})
-    
-    # Add image URLs to source
-    source_image_url, source_thumbnail_url = rec.get_image_urls(result['source']['mal_id'], anime_df)
-    result['source'].update({'image_url': source_image_url, 'thumbnail_url': source_thumbnail_url})
+    # Add image URLs to source and recommendations in one lookup
+    items = [result['source']] + result['recommendations']
+    image_urls = get_image_index('anime').lookup([item['mal_id'] for item in items])
+    for item, (image_url, thumbnail_url) in zip(items, image_urls):
+        item.update({'image_url': image_url, 'thumbnail_url': thumbnail_url})
     
     return {
         "source": result['source'],
@@ -2246,6 +5055,7 @@ def get_multi_anime_recommendations(request: Dict[str, Any]):
     include_sequels = request.get('include_sequels', True)
     explain = request.get('explain', False)
     diversity_weight = request.get('diversity_weight', 0.0)
+    one_per_franchise = request.get('one_per_franchise', False)
 
     print(f"Multi-recommend request: include_sequels={include_sequels}, anime_ids={anime_ids}")
 
@@ -2256,18 +5066,16 @@ def get_multi_anime_recommendations(request: Dict[str, Any]):
     try:
         result = rec.multi_recommend(anime_ids, top_k=top_k, min_score=min_score,
                                    include_sequels=include_sequels, explain=explain,
-                                   diversity_weight=diversity_weight)
+                                   diversity_weight=diversity_weight,
+                                   one_per_franchise=one_per_franchise)
         
         if "error" in result:
             return result
         
-        for rec_item in result['recommendations']:
-            image_url, thumbnail_url = rec.get_image_urls(rec_item['mal_id'], anime_df)
-            rec_item.update({'image_url': image_url, 'thumbnail_url': thumbnail_url})
-        
-        for source in result['source_anime']:
-            image_url, thumbnail_url = rec.get_image_urls(source['mal_id'], anime_df)
-            source.update({'image_url': image_url, 'thumbnail_url': thumbnail_url})
+        items = result['recommendations'] + result['source_anime']
+        image_urls = get_image_index('anime').lookup([item['mal_id'] for item in items])
+        for item, (image_url, thumbnail_url) in zip(items, image_urls):
+            item.update({'image_url': image_url, 'thumbnail_url': thumbnail_url})
         
         return result
         
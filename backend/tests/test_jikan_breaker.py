@@ -0,0 +1,164 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+try:
+    import main
+except Exception as e:  # the dataset files are not part of the repository
+    pytest.skip(f"main could not load the dataset: {e}", allow_module_level=True)
+
+LOCAL_ID = int(main.anime_df['mal_id'].iloc[0])
+UNKNOWN_ID = int(main.anime_df['mal_id'].max()) + 1000
+
+
+class StandInJikan:
+    """Local stand-in for the Jikan API that tests switch between healthy, failing and slow"""
+
+    def __init__(self):
+        self.calls = []
+        self.failing = False
+        self.delay = 0
+        self.missing = set()
+
+    async def handle(self, request):
+        self.calls.append(request.url.path)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.failing:
+            return httpx.Response(500)
+        mal_id = int(request.url.path.split('/')[-2])
+        if mal_id in self.missing:
+            return httpx.Response(404, json={'status': 404})
+        if request.url.path.endswith('/recommendations'):
+            return httpx.Response(200, json={'data': []})
+        return httpx.Response(200, json={'data': {'mal_id': mal_id, 'title': f"Upstream {mal_id}"}})
+
+
+@pytest.fixture
+def jikan(monkeypatch):
+    stand_in = StandInJikan()
+    monkeypatch.setattr(main, 'jikan_client', httpx.AsyncClient(transport=httpx.MockTransport(stand_in.handle)))
+    monkeypatch.setattr(main, 'jikan_cache', main.JikanCache(path=None))
+    monkeypatch.setattr(main, 'jikan_flight', main.SingleFlight())
+    monkeypatch.setattr(main, 'jikan_limiter', main.JikanRateLimiter([(1000, 1)]))
+    monkeypatch.setattr(main, 'jikan_breaker', main.CircuitBreaker(
+        window=60, min_calls=2, failure_rate=0.5, open_seconds=0.2))
+    monkeypatch.setattr(main, 'JIKAN_MAX_RETRIES', 0)
+    monkeypatch.setattr(main, 'JIKAN_CALL_DEADLINE', dict.fromkeys(main.JIKAN_CALL_DEADLINE, 0.2))
+    monkeypatch.setattr(main, 'JIKAN_TOTAL_DEADLINE', dict.fromkeys(main.JIKAN_TOTAL_DEADLINE, 1.0))
+    return stand_in
+
+
+def get(path, settle=0.0):
+    """GET path from the app; settle keeps the loop running afterwards for background tasks"""
+    async def request():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            response = await client.get(path)
+        await asyncio.sleep(settle)
+        return response
+    return asyncio.run(request())
+
+
+def open_breaker(jikan):
+    jikan.failing = True
+    get(f"/anime/{UNKNOWN_ID}")
+    assert main.jikan_breaker.state == 'open'
+
+
+def test_breaker_opens_and_short_circuits(jikan):
+    open_breaker(jikan)
+    calls = len(jikan.calls)
+
+    response = get(f"/anime/{UNKNOWN_ID}")
+    assert response.status_code == 503
+    assert 'retry-after' in response.headers
+    assert 'server-timing' in response.headers
+    assert len(jikan.calls) == calls
+
+
+def test_detail_falls_back_to_local_data(jikan):
+    open_breaker(jikan)
+    calls = len(jikan.calls)
+
+    response = get(f"/anime/{LOCAL_ID}")
+    assert response.status_code == 200
+    assert response.json()['source'] == 'local'
+    assert response.json()['anime']['mal_id'] == LOCAL_ID
+    assert len(jikan.calls) == calls
+
+
+def test_fallback_does_not_queue_refreshes(jikan, monkeypatch):
+    # Keep the breaker closed so any background refresh would reach the upstream
+    monkeypatch.setattr(main, 'jikan_breaker', main.CircuitBreaker(
+        window=60, min_calls=100, failure_rate=0.5, open_seconds=0.2))
+    jikan.failing = True
+
+    response = get(f"/anime/{LOCAL_ID}", settle=0.1)
+    assert response.status_code == 200
+    assert response.json()['source'] == 'local'
+    # Only the interactive /full and /recommendations calls
+    assert len(jikan.calls) == 2
+
+
+def test_half_open_probe_closes_breaker(jikan):
+    open_breaker(jikan)
+    time.sleep(main.jikan_breaker.open_seconds + 0.05)
+    jikan.failing = False
+
+    response = get(f"/anime/{UNKNOWN_ID}")
+    assert response.status_code == 200
+    assert response.json()['anime']['title'] == f"Upstream {UNKNOWN_ID}"
+    assert main.jikan_breaker.state == 'closed'
+
+
+def test_deadline_maps_to_504(jikan):
+    jikan.delay = 1.0
+
+    start = time.monotonic()
+    response = get(f"/anime/{UNKNOWN_ID}")
+    assert response.status_code == 504
+    assert time.monotonic() - start < jikan.delay
+
+
+def test_retries_stop_within_total_deadline(jikan, monkeypatch):
+    monkeypatch.setattr(main, 'JIKAN_MAX_RETRIES', 5)
+    monkeypatch.setattr(main, 'JIKAN_RETRY_BASE_DELAY', 0.01)
+    monkeypatch.setattr(main, 'JIKAN_TOTAL_DEADLINE', dict.fromkeys(main.JIKAN_TOTAL_DEADLINE, 0.5))
+    monkeypatch.setattr(main, 'jikan_breaker', main.CircuitBreaker(
+        window=60, min_calls=100, failure_rate=0.5, open_seconds=0.2))
+    jikan.failing = True
+    jikan.delay = 0.15
+
+    start = time.monotonic()
+    response = asyncio.run(main.jikan_get(f"/anime/{UNKNOWN_ID}/full", main.PRIORITY_INTERACTIVE))
+    assert response.status_code == 500
+    assert time.monotonic() - start < 0.5
+    # The second failure leaves less than a retry delay plus a call deadline
+    assert len(jikan.calls) == 2
+
+
+def test_unknown_source_is_rejected(jikan):
+    response = get(f"/anime/{LOCAL_ID}?source=locl")
+    assert response.status_code == 422
+    assert jikan.calls == []
+
+
+def test_local_mode_remembers_upstream_404(jikan, monkeypatch):
+    monkeypatch.setattr(main, 'jikan_cache', main.JikanCache(path=None, not_found_ttl=60))
+    jikan.missing.add(LOCAL_ID)
+
+    response = get(f"/anime/{LOCAL_ID}?source=local", settle=0.1)
+    assert response.status_code == 200
+    # The background refresh of /full and /recommendations
+    assert len(jikan.calls) == 2
+
+    response = get(f"/anime/{LOCAL_ID}?source=local", settle=0.1)
+    assert response.status_code == 200
+    assert response.json()['enrichment'] == {'full': 'missing', 'recommendations': 'missing'}
+    assert len(jikan.calls) == 2
@@ -0,0 +1,65 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+try:
+    import main
+except Exception as e:  # the dataset files are not part of the repository
+    pytest.skip(f"main could not load the dataset: {e}", allow_module_level=True)
+
+
+def test_interactive_call_does_not_wait_behind_background_fetch():
+    async def scenario():
+        flight = main.SingleFlight()
+        release = asyncio.Event()
+        calls = []
+
+        async def fetch(label, wait=False):
+            calls.append(label)
+            if wait:
+                # Stands in for a background fetch queued in the rate limiter
+                await release.wait()
+            return label
+
+        background = asyncio.create_task(
+            flight.do('/anime/1/full', lambda: fetch('background', wait=True), main.PRIORITY_BACKGROUND))
+        await asyncio.sleep(0)
+
+        interactive = await asyncio.wait_for(
+            flight.do('/anime/1/full', lambda: fetch('interactive'), main.PRIORITY_INTERACTIVE), timeout=1)
+        assert interactive == 'interactive'
+        assert calls == ['background', 'interactive']
+
+        release.set()
+        assert await background == 'background'
+        assert flight.stats() == {'leaders': 2, 'shared': 0, 'inflight': 0}
+
+    asyncio.run(scenario())
+
+
+def test_less_urgent_callers_join_the_running_fetch():
+    async def scenario():
+        flight = main.SingleFlight()
+        release = asyncio.Event()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await release.wait()
+            return 'shared'
+
+        callers = [
+            asyncio.create_task(flight.do('/anime/1/full', fetch, priority))
+            for priority in (main.PRIORITY_INTERACTIVE, main.PRIORITY_INTERACTIVE, main.PRIORITY_BACKGROUND)
+        ]
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await asyncio.gather(*callers) == ['shared'] * 3
+        assert len(calls) == 1
+        assert flight.stats() == {'leaders': 1, 'shared': 2, 'inflight': 0}
+
+    asyncio.run(scenario())
@@ -0,0 +1,44 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+try:
+    import main
+except Exception as e:  # the dataset files are not part of the repository
+    pytest.skip(f"main could not load the dataset: {e}", allow_module_level=True)
+
+
+def get(path):
+    async def request():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            return await client.get(path)
+    return asyncio.run(request())
+
+
+@pytest.fixture
+def comma_genres(monkeypatch):
+    """Some anime genre cells as a plain comma-separated list instead of JSON"""
+    anime_df = main.anime_df.copy()
+    anime_df.loc[anime_df.index[:20], 'genres'] = 'Action, Zzzgenre'
+    monkeypatch.setattr(main, 'anime_df', anime_df)
+    monkeypatch.setattr(main, 'dataset_version', None)
+    monkeypatch.setattr(main, 'stats_cache', {"version": None})
+
+
+def test_cube_does_not_change_genre_stats(comma_genres, monkeypatch):
+    cube = get("/stats/cube?group_by=genre")
+    assert cube.status_code == 200
+    cube_genres = {group['genre']: group['count'] for group in cube.json()['groups']}
+    assert cube_genres['Zzzgenre'] == 20
+
+    after_cube = get("/stats/genres")
+    assert after_cube.status_code == 200
+    assert after_cube.json()['top_combined']['Zzzgenre']['anime'] == 20
+
+    monkeypatch.setattr(main, 'stats_cache', {"version": None})
+    assert get("/stats/genres").json() == after_cube.json()